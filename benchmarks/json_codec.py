@@ -0,0 +1,174 @@
+"""
+Micro-benchmark of the JSON codecs on Steam-sized payloads.
+
+Builds synthetic GetOwnedGames, GetFriendList and GetNewsForApp bodies of
+realistic sizes and times, for every available codec, decoding the raw body
+bytes and encoding the decoded object. The "requests" row decodes the way
+response.json() does, through a text copy of the body, as the baseline the
+codec layer replaces. Prints a table, or a JSON report with --json.
+
+Usage:
+    python benchmarks/json_codec.py --repeat 5 --library-sizes 100,2000,20000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import codec  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Payloads
+# ---------------------------------------------------------------------------
+
+def owned_games(size: int, rng: random.Random) -> dict:
+    games = [
+        {
+            "appid": 10 * (i + 1),
+            "name": f"Game {i} — {rng.choice(['Remastered', 'Deluxe Edition', 'GOTY', ''])}",
+            "playtime_forever": rng.randint(0, 20000),
+            "playtime_windows_forever": rng.randint(0, 20000),
+            "playtime_mac_forever": 0,
+            "playtime_linux_forever": 0,
+            "rtime_last_played": rng.randint(1_300_000_000, 1_700_000_000),
+            "img_icon_url": f"{rng.getrandbits(160):040x}",
+            "has_community_visible_stats": rng.random() < 0.5,
+        }
+        for i in range(size)
+    ]
+    return {"response": {"game_count": size, "games": games}}
+
+
+def friend_list(size: int, rng: random.Random) -> dict:
+    friends = [
+        {"steamid": str(76561198000000000 + rng.randint(0, 10 ** 8)), "relationship": "friend", "friend_since": rng.randint(1_300_000_000, 1_700_000_000)}
+        for _ in range(size)
+    ]
+    return {"friendslist": {"friends": friends}}
+
+
+def news(count: int, rng: random.Random) -> dict:
+    words = ["patch", "update", "balance", "fixed", "crash", "season", "event", "新しい", "更新", "map"]
+    items = [
+        {
+            "gid": str(rng.getrandbits(60)),
+            "title": " ".join(rng.choices(words, k=8)),
+            "url": f"https://steamstore-a.akamaihd.net/news/externalpost/steam_community_announcements/{rng.getrandbits(60)}",
+            "is_external_url": True,
+            "author": "developer",
+            "contents": " ".join(rng.choices(words, k=rng.randint(200, 1500))),
+            "feedlabel": "Community Announcements",
+            "date": rng.randint(1_600_000_000, 1_700_000_000),
+            "feedname": "steam_community_announcements",
+            "feed_type": 1,
+            "appid": 570,
+        }
+        for _ in range(count)
+    ]
+    return {"appnews": {"appid": 570, "newsitems": items, "count": count}}
+
+
+def payloads(library_sizes: list[int], friend_counts: list[int], news_counts: list[int], seed: int) -> list[tuple[str, bytes]]:
+    rng = random.Random(seed)
+    bodies = []
+    for size in library_sizes:
+        bodies.append((f"GetOwnedGames/{size}", owned_games(size, rng)))
+    for size in friend_counts:
+        bodies.append((f"GetFriendList/{size}", friend_list(size, rng)))
+    for count in news_counts:
+        bodies.append((f"GetNewsForApp/{count}", news(count, rng)))
+    # Steam sends spaced, non-ASCII-escaped JSON
+    return [(name, json.dumps(body, ensure_ascii=False).encode("utf-8")) for name, body in bodies]
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def codecs() -> dict[str, tuple]:
+    available = {
+        "requests": (lambda data: json.loads(data.decode("utf-8")), None),
+        "stdlib": (codec._stdlib_loads, codec._stdlib_dumps),
+    }
+    if codec.orjson is not None:
+        available["orjson"] = (codec._orjson_loads, codec._orjson_dumps)
+    return available
+
+
+def best_of(function, argument, repeat: int, number: int) -> float:
+    """Returns the fastest mean time of one call, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function(argument)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1000
+
+
+def run(bodies: list[tuple[str, bytes]], repeat: int, budget_seconds: float) -> list[dict]:
+    rows = []
+    for name, data in bodies:
+        decoded = json.loads(data)
+        # Enough calls per repetition to fill the time budget on the slowest codec
+        started = time.perf_counter()
+        json.loads(data)
+        number = max(1, int(budget_seconds / max(time.perf_counter() - started, 1e-6)))
+
+        for codec_name, (loads, dumps) in codecs().items():
+            row = {
+                "payload": name,
+                "bytes": len(data),
+                "codec": codec_name,
+                "decode_ms": round(best_of(loads, data, repeat, number), 4),
+            }
+            if dumps is not None:
+                row["encode_ms"] = round(best_of(dumps, decoded, repeat, number), 4)
+            rows.append(row)
+    return rows
+
+
+def print_table(rows: list[dict]) -> None:
+    baseline = {row["payload"]: row["decode_ms"] for row in rows if row["codec"] == "requests"}
+    print(f"{'payload':<22}{'bytes':>12}  {'codec':<10}{'decode ms':>11}{'speedup':>9}{'encode ms':>11}")
+    for row in rows:
+        speedup = baseline[row["payload"]] / row["decode_ms"] if row["decode_ms"] else 0
+        encode = f"{row['encode_ms']:.3f}" if "encode_ms" in row else "-"
+        print(f"{row['payload']:<22}{row['bytes']:>12,}  {row['codec']:<10}{row['decode_ms']:>11.3f}{speedup:>8.1f}x{encode:>11}")
+
+
+def int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--library-sizes", type=int_list, default=[100, 2000, 20000], help="games per GetOwnedGames body")
+    parser.add_argument("--friend-counts", type=int_list, default=[250, 2000], help="friends per GetFriendList body")
+    parser.add_argument("--news-counts", type=int_list, default=[20, 100], help="items per GetNewsForApp body")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions; the fastest is reported")
+    parser.add_argument("--budget", type=float, default=0.2, help="seconds per repetition for the baseline decoder")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print a JSON report instead of a table")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    rows = run(payloads(args.library_sizes, args.friend_counts, args.news_counts, args.seed), args.repeat, args.budget)
+    if args.json:
+        print(json.dumps({"active_codec": codec.CODEC_NAME, "results": rows}, indent=2))
+    else:
+        print(f"active codec: {codec.CODEC_NAME}")
+        print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,435 @@
+"""
+Load and soak test harness for the Steam tools.
+
+Starts a local stand-in for api.steampowered.com with injected latency and
+429 responses, then drives many concurrent tool invocations against it for a
+fixed duration while sampling memory, thread and socket counts. Prints a JSON
+report and exits non-zero when any configured threshold is exceeded.
+
+Usage:
+    python benchmarks/soak.py --duration 300 --concurrency 32 --latency-ms 150 --rate-429 0.02 \\
+        --max-p99-ms 2000 --max-error-rate 0.05 --max-memory-growth-mb 32
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------------------------------------------------------------------------
+# Stand-in Steam server
+# ---------------------------------------------------------------------------
+
+def _owned_games(steamid: str, library_size: int) -> dict:
+    rng = random.Random(steamid)
+    games = [
+        {
+            "appid": 10 * (i + 1),
+            "name": f"Game {i}",
+            "playtime_forever": rng.randint(0, 20000),
+            "img_icon_url": "0123456789abcdef",
+            "has_community_visible_stats": rng.random() < 0.5,
+        }
+        for i in range(library_size)
+    ]
+    return {"response": {"game_count": len(games), "games": games}}
+
+
+def _recent_games(steamid: str) -> dict:
+    rng = random.Random(steamid)
+    games = [
+        {"appid": 10 * (i + 1), "name": f"Game {i}", "playtime_2weeks": rng.randint(1, 900), "playtime_forever": rng.randint(900, 20000)}
+        for i in range(rng.randint(0, 8))
+    ]
+    return {"response": {"total_count": len(games), "games": games}}
+
+
+def _friends(steamid: str, friend_count: int) -> dict:
+    rng = random.Random(steamid)
+    friends = [
+        {"steamid": str(76561198000000000 + rng.randint(0, 10 ** 8)), "relationship": "friend", "friend_since": rng.randint(1_300_000_000, 1_700_000_000)}
+        for _ in range(friend_count)
+    ]
+    return {"friendslist": {"friends": friends}}
+
+
+def _players(steamids: str) -> dict:
+    return {"response": {"players": [
+        {"steamid": steamid, "personaname": f"Player {steamid[-4:]}", "personastate": int(steamid[-1]) % 7, "profileurl": "https://steamcommunity.com/"}
+        for steamid in steamids.split(",") if steamid
+    ]}}
+
+
+def _achievements(appid: str, steamid: str, count: int = 50) -> dict:
+    rng = random.Random(f"{appid}:{steamid}")
+    return {"playerstats": {"steamID": steamid, "gameName": f"Game {appid}", "success": True, "achievements": [
+        {"apiname": f"ACH_{i}", "achieved": int(rng.random() < 0.4), "unlocktime": rng.randint(1_400_000_000, 1_700_000_000)}
+        for i in range(count)
+    ]}}
+
+
+def _user_stats(appid: str, steamid: str) -> dict:
+    rng = random.Random(f"{appid}:{steamid}")
+    return {"playerstats": {"steamID": steamid, "gameName": f"Game {appid}",
+                            "stats": [{"name": f"stat_{i}", "value": rng.randint(0, 5000)} for i in range(20)],
+                            "achievements": [{"name": f"ACH_{i}", "achieved": int(rng.random() < 0.4)} for i in range(50)]}}
+
+
+def _schema(appid: str) -> dict:
+    return {"game": {"gameName": f"Game {appid}", "availableGameStats": {
+        "achievements": [
+            {"name": f"ACH_{i}", "displayName": f"Achievement {i}", "description": f"Do thing number {i}.", "hidden": int(i % 10 == 0), "icon": "icon", "icongray": "gray"}
+            for i in range(50)
+        ],
+        "stats": [{"name": f"stat_{i}", "displayName": f"Stat {i}"} for i in range(20)],
+    }}}
+
+
+def _news(appid: str, count: int) -> dict:
+    return {"appnews": {"appid": int(appid), "newsitems": [
+        {"gid": str(i), "title": f"Update {i}", "url": "https://store.steampowered.com/news", "author": "dev",
+         "contents": "Patch notes. " * 40, "date": 1_700_000_000 - i * 86400, "feedlabel": "Community Announcements"}
+        for i in range(count)
+    ]}}
+
+
+def _global_percentages() -> dict:
+    return {"achievementpercentages": {"achievements": [{"name": f"ACH_{i}", "percent": 100 / (i + 1)} for i in range(50)]}}
+
+
+def make_handler(latency_ms: float, jitter_ms: float, rate_429: float, library_size: int, friend_count: int):
+    class StandInSteamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0) / 1000)
+            if random.random() < rate_429:
+                self._send(429, {})
+                return
+
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            method = url.path.strip("/").split("/")[1] if url.path.count("/") > 1 else ""
+            steamid = query.get("steamid", "")
+            appid = query.get("appid") or query.get("gameid") or "0"
+
+            routes = {
+                "GetPlayerSummaries": lambda: _players(query.get("steamids", "")),
+                "GetOwnedGames": lambda: _owned_games(steamid, library_size),
+                "GetRecentlyPlayedGames": lambda: _recent_games(steamid),
+                "GetFriendList": lambda: _friends(steamid, friend_count),
+                "GetPlayerAchievements": lambda: _achievements(appid, steamid),
+                "GetUserStatsForGame": lambda: _user_stats(appid, steamid),
+                "GetSchemaForGame": lambda: _schema(appid),
+                "GetNewsForApp": lambda: _news(appid, int(query.get("count", 3))),
+                "GetGlobalAchievementPercentagesForApp": _global_percentages,
+            }
+            route = routes.get(method)
+            if route is None:
+                self._send(404, {})
+                return
+            self._send(200, route())
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return StandInSteamHandler
+
+
+def serve(args) -> None:
+    handler = make_handler(args.latency_ms, args.jitter_ms, args.rate_429, args.library_size, args.friend_count)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def start_server(args) -> tuple[subprocess.Popen, int]:
+    """Runs the stand-in server in a separate process so it does not compete with the tools for the GIL."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    command = [
+        sys.executable, os.path.abspath(__file__), "serve", "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms), "--rate-429", str(args.rate_429),
+        "--library-size", str(args.library_size), "--friend-count", str(args.friend_count),
+    ]
+    process = subprocess.Popen(command)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Stand-in Steam server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def build_workload(steamid_pool: int):
+    """Returns (tool name, tool class, parameter factory) entries covering every tool."""
+    from tools.steam import SteamTool
+    from tools.steam_achievement_comparison import SteamAchievementComparisonTool
+    from tools.steam_achievement_timeline import SteamAchievementTimelineTool
+    from tools.steam_achievements import SteamAchievementsTool
+    from tools.steam_batch import SteamBatchTool
+    from tools.steam_friend_list import SteamFriendListTool
+    from tools.steam_news import SteamNewsTool
+    from tools.steam_owned_games import SteamOwnedGamesTool
+    from tools.steam_player_achievements import SteamPlayerAchievementsTool
+    from tools.steam_player_details import SteamPlayerDetailsTool
+    from tools.steam_player_dossier import SteamPlayerDossierTool
+    from tools.steam_playtime_trends import SteamPlaytimeTrendsTool
+    from tools.steam_presence_watch import SteamPresenceWatchTool
+    from tools.steam_recently_played import SteamRecentlyPlayedTool
+    from tools.steam_usage import SteamUsageTool
+    from tools.steam_user_stats import SteamUserStatsTool
+
+    def steamid(rng: random.Random) -> str:
+        return str(76561198000000000 + rng.randrange(steamid_pool))
+
+    def appid(rng: random.Random) -> str:
+        return str(10 * rng.randint(1, 200))
+
+    def batch_entries(rng: random.Random) -> str:
+        entries = [{"tool": "steam_news", "parameters": {"appid": appid(rng), "count": "3"}} for _ in range(5)]
+        entries += [{"tool": "steam_recently_played", "parameters": {"steamid": steamid(rng)}} for _ in range(5)]
+        return json.dumps(entries)
+
+    return [
+        ("steam", SteamTool, lambda rng: {"steam_id": steamid(rng)}),
+        ("steam_achievement_comparison", SteamAchievementComparisonTool, lambda rng: {"appid": appid(rng), "steamids": ",".join(steamid(rng) for _ in range(5))}),
+        ("steam_achievement_timeline", SteamAchievementTimelineTool, lambda rng: {"steamid": steamid(rng)}),
+        ("steam_achievements", SteamAchievementsTool, lambda rng: {"gameid": appid(rng)}),
+        ("steam_batch", SteamBatchTool, lambda rng: {"entries": batch_entries(rng)}),
+        ("steam_friend_list", SteamFriendListTool, lambda rng: {"steamid": steamid(rng)}),
+        ("steam_news", SteamNewsTool, lambda rng: {"appid": appid(rng), "count": "5"}),
+        ("steam_owned_games", SteamOwnedGamesTool, lambda rng: {"steamid": steamid(rng)}),
+        ("steam_player_achievements", SteamPlayerAchievementsTool, lambda rng: {"steamid": steamid(rng), "appid": appid(rng)}),
+        ("steam_player_details", SteamPlayerDetailsTool, lambda rng: {"steamids": ",".join(steamid(rng) for _ in range(20))}),
+        ("steam_player_dossier", SteamPlayerDossierTool, lambda rng: {"steamid": steamid(rng)}),
+        ("steam_playtime_trends", SteamPlaytimeTrendsTool, lambda rng: {"steamid": steamid(rng)}),
+        ("steam_presence_watch", SteamPresenceWatchTool, lambda rng: {"steamids": ",".join(steamid(rng) for _ in range(20))}),
+        ("steam_recently_played", SteamRecentlyPlayedTool, lambda rng: {"steamid": steamid(rng), "record": "true"}),
+        ("steam_usage", SteamUsageTool, lambda rng: {}),
+        ("steam_user_stats", SteamUserStatsTool, lambda rng: {"steamid": steamid(rng), "appid": appid(rng)}),
+    ]
+
+
+def sample_process() -> dict:
+    """Reads RSS, thread count and open socket count of the current process."""
+    rss_kb = 0
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+                    break
+    except OSError:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    sockets = 0
+    try:
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                    sockets += 1
+            except OSError:
+                continue
+    except OSError:
+        sockets = -1
+
+    return {"rss_mb": round(rss_kb / 1024, 2), "threads": threading.active_count(), "sockets": sockets}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_soak(args) -> dict:
+    from dify_plugin.entities.tool import ToolRuntime
+
+    workload = build_workload(args.steamid_pool)
+    stop_at = time.monotonic() + args.duration
+    lock = threading.Lock()
+    latencies: dict[str, list[float]] = {name: [] for name, _, _ in workload}
+    errors: dict[str, dict[str, int]] = {name: {} for name, _, _ in workload}
+    samples = []
+
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        runtime = ToolRuntime(credentials={"api_key": "SOAKTESTKEY", "steam_id": "76561198000000000"}, user_id="soak", session_id=None)
+        while time.monotonic() < stop_at:
+            name, tool_class, make_params = rng.choice(workload)
+            tool = tool_class(runtime=runtime, session=None)
+            started = time.perf_counter()
+            try:
+                for _ in tool._invoke(make_params(rng)):
+                    pass
+                failure = None
+            except Exception as e:
+                failure = "rate_limited" if "429" in str(e) else type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies[name].append(elapsed_ms)
+                if failure:
+                    errors[name][failure] = errors[name].get(failure, 0) + 1
+
+    def monitor() -> None:
+        started = time.monotonic()
+        while time.monotonic() < stop_at:
+            samples.append({"t": round(time.monotonic() - started, 1), **sample_process()})
+            time.sleep(args.sample_interval)
+
+    threads = [threading.Thread(target=worker, args=(args.seed + i,), daemon=True) for i in range(args.concurrency)]
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    started = time.monotonic()
+    monitor_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    monitor_thread.join()
+    wall = time.monotonic() - started
+    samples.append({"t": round(wall, 1), **sample_process()})
+
+    all_latencies = sorted(value for values in latencies.values() for value in values)
+    calls = len(all_latencies)
+    failed = sum(sum(kinds.values()) for kinds in errors.values())
+
+    # Memory growth compares the steady state after warm-up with the end of the run
+    steady = [s for s in samples if s["t"] >= args.warmup] or samples
+    head = steady[: max(len(steady) // 5, 1)]
+    tail = steady[-max(len(steady) // 5, 1):]
+    memory_growth = sum(s["rss_mb"] for s in tail) / len(tail) - sum(s["rss_mb"] for s in head) / len(head)
+
+    per_tool = {}
+    for name, values in latencies.items():
+        values.sort()
+        per_tool[name] = {
+            "calls": len(values),
+            "errors": errors[name],
+            "p50_ms": round(percentile(values, 0.50), 1),
+            "p95_ms": round(percentile(values, 0.95), 1),
+            "p99_ms": round(percentile(values, 0.99), 1),
+        }
+
+    return {
+        "duration_s": round(wall, 1),
+        "concurrency": args.concurrency,
+        "calls": calls,
+        "throughput_per_s": round(calls / wall, 2) if wall else 0,
+        "error_rate": round(failed / calls, 4) if calls else 0,
+        "p50_ms": round(percentile(all_latencies, 0.50), 1),
+        "p95_ms": round(percentile(all_latencies, 0.95), 1),
+        "p99_ms": round(percentile(all_latencies, 0.99), 1),
+        "memory_growth_mb": round(memory_growth, 2),
+        "max_rss_mb": max(s["rss_mb"] for s in samples),
+        "max_threads": max(s["threads"] for s in samples),
+        "max_sockets": max(s["sockets"] for s in samples),
+        "per_tool": per_tool,
+        "samples": samples,
+    }
+
+
+def check_thresholds(report: dict, args) -> list[str]:
+    checks = [
+        ("p99_ms", args.max_p99_ms, lambda value, limit: value > limit),
+        ("error_rate", args.max_error_rate, lambda value, limit: value > limit),
+        ("memory_growth_mb", args.max_memory_growth_mb, lambda value, limit: value > limit),
+        ("max_threads", args.max_threads, lambda value, limit: value > limit),
+        ("max_sockets", args.max_sockets, lambda value, limit: value > limit),
+        ("throughput_per_s", args.min_throughput, lambda value, limit: value < limit),
+    ]
+    return [
+        f"{metric}={report[metric]} violates threshold {limit}"
+        for metric, limit, violated in checks
+        if limit is not None and violated(report[metric], limit)
+    ]
+
+
+def parse_args(argv: list[str]):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", nargs="?", default="run", choices=["run", "serve"])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=120, help="seconds of sustained load")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds excluded from the memory baseline")
+    parser.add_argument("--concurrency", type=int, default=32, help="parallel tool invocations")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=100, help="injected upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--rate-429", type=float, default=0.01, help="fraction of upstream calls answered with 429")
+    parser.add_argument("--library-size", type=int, default=500)
+    parser.add_argument("--friend-count", type=int, default=200)
+    parser.add_argument("--steamid-pool", type=int, default=10000, help="distinct Steam IDs; larger pools defeat caching")
+    parser.add_argument("--disable-cache", action="store_true", help="set every response cache TTL to zero")
+    parser.add_argument("--report", help="also write the JSON report to this file")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float)
+    parser.add_argument("--max-memory-growth-mb", type=float)
+    parser.add_argument("--max-threads", type=int)
+    parser.add_argument("--max-sockets", type=int)
+    parser.add_argument("--min-throughput", type=float)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if args.mode == "serve":
+        serve(args)
+        return 0
+
+    server, port = start_server(args)
+    try:
+        # Configuration is read at import time, so set it before loading the tools
+        os.environ["STEAM_API_BASE_URL"] = f"http://127.0.0.1:{port}"
+        os.environ.setdefault("STEAM_DATA_DIR", os.path.join(ROOT, ".soak-data"))
+        if args.disable_cache:
+            os.environ["STEAM_CACHE_TTL"] = "*=0"
+            os.environ["STEAM_NEGATIVE_TTL"] = "private_profile=0,no_stats=0,not_found=0,empty=0"
+        sys.path.insert(0, ROOT)
+
+        report = run_soak(args)
+    finally:
+        server.terminate()
+        server.wait()
+
+    failures = check_thresholds(report, args)
+    report["threshold_failures"] = failures
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.report:
+        with open(args.report, "w") as report_file:
+            report_file.write(output)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
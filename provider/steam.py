@@ -1,16 +1,19 @@
 from typing import Any
-import requests
 
 from dify_plugin import ToolProvider
 from dify_plugin.errors.tool import ToolProviderCredentialValidationError
 
+from utils.codec import loads
+from utils.key_pool import mask_key, split_keys
+from utils.steam_api import API_BASE_URL, REQUEST_TIMEOUT, get_json, get_session, run_concurrently
+
 
 class SteamProvider(ToolProvider):
     def _validate_credentials(self, credentials: dict[str, Any]) -> None:
         try:
-            # Get API Key
-            api_key = credentials.get("api_key")
-            if not api_key:
+            # Get API Keys; several keys may be separated by commas
+            keys = split_keys(credentials.get("api_key"))
+            if not keys:
                 raise ToolProviderCredentialValidationError("Steam API Key cannot be empty")
             
             # Get Steam ID
@@ -18,23 +21,19 @@ class SteamProvider(ToolProvider):
             if not steam_id:
                 raise ToolProviderCredentialValidationError("Steam ID cannot be empty")
             
-            # Make API call to validate credentials
-            url = f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={api_key}&steamids={steam_id}"
-            response = requests.get(url)
-            
-            # Validate response status code
-            if response.status_code != 200:
-                raise ToolProviderCredentialValidationError(f"API validation failed with status code: {response.status_code}")
-            
-            # Check API response format
-            response_data = response.json()
-            if 'response' not in response_data or 'players' not in response_data['response']:
-                raise ToolProviderCredentialValidationError("Invalid API response format")
+            # Validate all keys concurrently
+            results = run_concurrently({
+                key: (lambda key=key: self._validate_key(key, steam_id))
+                for key in keys
+            })
             
-            # Verify if the specified user was found
-            players = response_data['response']['players']
-            if not players:
-                raise ToolProviderCredentialValidationError(f"No Steam user found with ID: {steam_id}")
+            failures = [
+                f"{mask_key(key)}: {str(result)}" if len(keys) > 1 else str(result)
+                for key, result in results.items()
+                if isinstance(result, Exception)
+            ]
+            if failures:
+                raise ToolProviderCredentialValidationError("; ".join(failures))
                 
         except ToolProviderCredentialValidationError:
             # Directly re-raise custom validation errors
@@ -43,6 +42,26 @@ class SteamProvider(ToolProvider):
             # Handle other possible errors
             raise ToolProviderCredentialValidationError(f"Credential validation failed: {str(e)}")
     
+    def _validate_key(self, api_key: str, steam_id: str) -> None:
+        """Checks a single API key by looking up the configured Steam ID"""
+        # Make API call to validate credentials
+        url = f"{API_BASE_URL}/ISteamUser/GetPlayerSummaries/v0002/"
+        response = get_session().get(url, params={"key": api_key, "steamids": steam_id}, timeout=REQUEST_TIMEOUT)
+        
+        # Validate response status code
+        if response.status_code != 200:
+            raise ToolProviderCredentialValidationError(f"API validation failed with status code: {response.status_code}")
+        
+        # Check API response format
+        response_data = loads(response.content)
+        if 'response' not in response_data or 'players' not in response_data['response']:
+            raise ToolProviderCredentialValidationError("Invalid API response format")
+        
+        # Verify if the specified user was found
+        players = response_data['response']['players']
+        if not players:
+            raise ToolProviderCredentialValidationError(f"No Steam user found with ID: {steam_id}")
+    
     def get_player_summary(self, steam_id: str) -> dict:
         """Get Steam user profile information"""
         api_key = self.credentials.get('api_key')
@@ -50,13 +69,8 @@ class SteamProvider(ToolProvider):
             return {"success": False, "message": "API Key does not exist"}
         
         try:
-            url = f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={api_key}&steamids={steam_id}"
-            response = requests.get(url)
-            
-            if response.status_code != 200:
-                return {"success": False, "message": f"Steam API request failed: HTTP status code {response.status_code}"}
-            
-            data = response.json()
+            # Goes through the shared client so multi-key credentials are rotated and calls are metered
+            data = get_json("ISteamUser/GetPlayerSummaries/v0002/", {"key": api_key, "steamids": steam_id})
             
             if 'response' not in data or 'players' not in data['response']:
                 return {"success": False, "message": "Invalid API response format"}
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests import the plugin's modules the way main.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The SDK monkey-patches the standard library with gevent on import; main.py imports it first, so do the tests
+import dify_plugin  # noqa: E402,F401
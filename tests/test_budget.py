@@ -0,0 +1,44 @@
+from utils.budget import OutputBudget
+from utils.codec import dumps
+
+
+def test_envelope_counts_against_max_output_bytes():
+    budget = OutputBudget(max_output_bytes=2000)
+    result = {
+        "success": True,
+        "game": {"appid": "440", "name": "Team Fortress 2"},
+        "unavailable": [{"steamid": str(76561197960287930 + i), "reason": "Profile is private"} for i in range(10)],
+        "stats": [],
+    }
+
+    budget.charge(result)
+    stats = [{"name": f"stat_{i}", "value": i} for i in range(200)]
+    for index, stat in enumerate(stats):
+        if budget.exhausted:
+            budget.omit(len(stats) - index)
+            break
+        stat = budget.take(stat)
+        if stat is not None:
+            result["stats"].append(stat)
+    result["truncated"] = budget.report()
+    result["cache_age_seconds"] = 1234
+
+    assert result["stats"]
+    assert result["truncated"]["omitted_items"] == 200 - len(result["stats"])
+    assert len(dumps(result)) <= 2000
+
+
+def test_envelope_larger_than_the_budget_exhausts_it():
+    budget = OutputBudget(max_output_bytes=100)
+    budget.charge({"unavailable": ["x" * 200]})
+
+    assert budget.exhausted
+    assert budget.take({"name": "a"}) is None
+
+
+def test_charge_is_free_without_a_byte_limit():
+    budget = OutputBudget(max_items=1)
+    budget.charge({"unavailable": ["x" * 200]})
+
+    assert not budget.exhausted
+    assert budget.take({"name": "a"}) == {"name": "a"}
@@ -0,0 +1,41 @@
+from utils.cache import ResponseCache, StripedLocks
+
+
+def test_evicts_least_recently_used_entries_past_max_bytes():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", "A", 40)
+    cache.set("b", "B", 40)
+    cache.get("a")
+    cache.set("c", "C", 40)
+
+    assert cache.get("b") is None
+    assert cache.get("a").value == "A"
+    assert cache.total_bytes == 80
+
+
+def test_replacing_an_entry_releases_its_bytes():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", "A", 60)
+    cache.set("a", "A2", 30)
+
+    assert cache.total_bytes == 30
+    assert cache.get("a").value == "A2"
+
+
+def test_values_larger_than_max_bytes_are_not_cached():
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", "A", 40)
+    cache.set("big", "B", 101)
+
+    assert cache.get("big") is None
+    assert cache.get("a").value == "A"
+    assert cache.total_bytes == 40
+
+
+def test_striped_locks_stay_bounded_and_map_a_key_to_one_lock():
+    locks = StripedLocks(stripes=8)
+
+    handed_out = {id(locks.for_key(f"76561197960287930|{appid}")) for appid in range(10000)}
+
+    assert len(handed_out) <= 8
+    assert locks.for_key("440|english") is locks.for_key("440|english")
@@ -0,0 +1,24 @@
+import math
+
+from utils.cohort import build_stat_matrix, rank_column
+
+
+def test_unreported_stats_rank_as_zero_when_filled():
+    # Steam leaves zero-valued stats out, so "b" and "c" have 0 kills
+    player_stats = {"a": {"kills": 5.0, "deaths": 1.0}, "b": {"deaths": 2.0}, "c": {"deaths": 3.0}}
+
+    stat_names, steamids, matrix = build_stat_matrix(player_stats, missing_value=0.0)
+    ranking = rank_column(matrix, steamids.index("a"))
+    kills = stat_names.index("kills")
+
+    assert ranking["rank"][kills] == 1
+    assert ranking["cohort_size"][kills] == 3
+    assert round(ranking["percentile"][kills], 2) == 83.33
+
+
+def test_unreported_stats_are_excluded_by_default():
+    stat_names, steamids, matrix = build_stat_matrix({"a": {"kills": 5.0}, "b": {"deaths": 2.0}})
+    ranking = rank_column(matrix, steamids.index("b"))
+
+    assert ranking["cohort_size"][stat_names.index("kills")] == 1
+    assert math.isnan(ranking["rank"][stat_names.index("kills")])
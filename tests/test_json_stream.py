@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from utils.json_stream import iter_json_array
+
+BODIES = [
+    {"response": {"game_count": 3, "games": [{"appid": 10, "name": "Café ☕"}, {"appid": 20, "name": "游戏"}, {"appid": 30}]}},
+    {"response": {"games": [123, 456, -7.5e3, 0, 98765432109876543210]}},
+    {"response": {"games": [True, False, None, "a,b]c", "ü", [1, [2, 3]], {}, []]}},
+    {"response": {"games": []}},
+]
+
+
+def split(body: bytes, *offsets: int) -> list[bytes]:
+    bounds = [0, *offsets, len(body)]
+    return [body[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize("document", BODIES)
+def test_elements_survive_a_split_at_every_byte_offset(document):
+    body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    expected = document["response"]["games"]
+
+    for offset in range(len(body) + 1):
+        assert list(iter_json_array(split(body, offset), "games")) == expected, offset
+
+
+@pytest.mark.parametrize("document", BODIES)
+def test_elements_survive_single_byte_chunks(document):
+    body = json.dumps(document, ensure_ascii=False).encode("utf-8")
+
+    assert list(iter_json_array(split(body, *range(1, len(body))), "games")) == document["response"]["games"]
+
+
+def test_missing_key_yields_nothing():
+    assert list(iter_json_array([b'{"response": {}}'], "games")) == []
+
+
+def test_truncated_array_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"games": [123, 45'], "games"))
+
+
+def test_non_array_value_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"games": 3}'], "games"))
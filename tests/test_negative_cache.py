@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+import utils.steam_api as steam_api
+from utils.negative_cache import classify_body
+
+OWNED_GAMES = "IPlayerService/GetOwnedGames/v0001/"
+
+
+class FakeResponse:
+    def __init__(self, body: dict):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(body).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Answers GetOwnedGames with a one-game library, or nothing when a filter excludes that game."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        self.calls.append(dict(params))
+        filters = [value for name, value in params.items() if name.startswith("appids_filter")]
+        games = [{"appid": 440, "playtime_forever": 60}]
+        games = [game for game in games if not filters or game["appid"] in filters]
+        if not games:
+            return FakeResponse({"response": {"game_count": 0}})
+        return FakeResponse({"response": {"game_count": len(games), "games": games}})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession()
+    monkeypatch.setattr(steam_api, "_session", fake)
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+    yield fake
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+
+
+def test_filtered_empty_library_does_not_poison_unfiltered_call(session):
+    base = {"key": "K", "steamid": "76561197960287930", "format": "json", "include_played_free_games": 1}
+
+    filtered = steam_api.get_json(OWNED_GAMES, {**base, "appids_filter[0]": 999})
+    assert filtered["response"]["game_count"] == 0
+
+    unfiltered = steam_api.get_json(OWNED_GAMES, base)
+    assert unfiltered["response"]["games"] == [{"appid": 440, "playtime_forever": 60}]
+    assert len(session.calls) == 2
+
+
+def test_empty_full_library_is_remembered(session, monkeypatch):
+    monkeypatch.setattr(session, "get", lambda *args, **kwargs: session.calls.append(kwargs) or FakeResponse({"response": {"game_count": 0}}))
+    params = {"key": "K", "steamid": "76561197960287930", "format": "json", "include_played_free_games": 1}
+
+    steam_api.get_json(OWNED_GAMES, params)
+    steam_api.response_cache.clear()
+    steam_api.get_json(OWNED_GAMES, params)
+    assert len(session.calls) == 1
+
+
+def test_narrowed_requests_are_not_classified_empty():
+    empty = {"response": {"game_count": 0}}
+    assert classify_body(OWNED_GAMES, empty, {"include_played_free_games": 1}) == "empty"
+    assert classify_body(OWNED_GAMES, empty, {"include_played_free_games": 1, "appids_filter[0]": 999}) is None
+    assert classify_body(OWNED_GAMES, empty, {}) is None
+    assert classify_body(OWNED_GAMES, {"response": {}}, {"appids_filter[0]": 999}) == "private_profile"
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from dify_plugin.entities.tool import ToolRuntime
+
+import utils.steam_api as steam_api
+import utils.storage as storage
+from tools.steam_recently_played import SteamRecentlyPlayedTool
+
+
+class FakeResponse:
+    def __init__(self, body: dict):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(body).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def get(self, url, params=None, timeout=None, stream=False):
+        games = [{"appid": 440, "name": "Team Fortress 2", "playtime_2weeks": 90, "playtime_forever": 6000}]
+        return FakeResponse({"response": {"total_count": len(games), "games": games}})
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.setattr(steam_api, "_session", FakeSession())
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+    yield
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+
+
+def invoke(tool_parameters: dict) -> dict:
+    runtime = ToolRuntime(credentials={"api_key": "K"}, user_id="u", session_id=None)
+    messages = list(SteamRecentlyPlayedTool(runtime=runtime, session=None)._invoke(tool_parameters))
+    return messages[0].message.json_object
+
+
+def test_record_on_a_cached_response_reports_why_nothing_was_recorded(session):
+    fetched = invoke({"steamid": "76561197960287930", "record": "true"})
+    cached = invoke({"steamid": "76561197960287930", "record": "true"})
+
+    assert fetched["samples_recorded"] == 1
+    assert "record_skipped" not in fetched
+    assert cached["samples_recorded"] == 0
+    assert "cache" in cached["record_skipped"]
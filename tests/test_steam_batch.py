@@ -0,0 +1,60 @@
+import json
+
+import pytest
+from dify_plugin.entities.tool import ToolRuntime
+
+import utils.steam_api as steam_api
+from tools.steam_batch import SteamBatchTool
+
+LIBRARY_SIZE = 5000
+
+
+class FakeResponse:
+    def __init__(self, body: dict):
+        self.status_code = 200
+        self.headers = {}
+        self.content = json.dumps(body).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Answers GetOwnedGames with a large library for every Steam ID."""
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        games = [
+            {"appid": 10 * (i + 1), "name": f"Game {i}", "playtime_forever": LIBRARY_SIZE - i, "img_icon_url": "0123456789abcdef"}
+            for i in range(LIBRARY_SIZE)
+        ]
+        return FakeResponse({"response": {"game_count": len(games), "games": games}})
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(steam_api, "_session", FakeSession())
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+    yield
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+
+
+def invoke(tool_parameters: dict) -> dict:
+    runtime = ToolRuntime(credentials={"api_key": "K"}, user_id="u", session_id=None)
+    messages = list(SteamBatchTool(runtime=runtime, session=None)._invoke(tool_parameters))
+    return messages[0].message.json_object
+
+
+def test_large_entries_each_return_data_within_the_budget(session):
+    entries = [{"tool": "steam_owned_games", "parameters": {"steamid": str(76561197960287930 + i)}} for i in range(3)]
+
+    result = invoke({"entries": json.dumps(entries), "max_output_bytes": "60000"})
+
+    assert [item["index"] for item in result["results"]] == [0, 1, 2]
+    for item in result["results"]:
+        assert item["success"]
+        assert item["result"]["games"]
+        assert item["result"]["truncated"]["omitted_items"] > 0
+    assert "truncated" not in result
+    assert len(json.dumps(result, separators=(",", ":"))) <= 60000
@@ -0,0 +1,15 @@
+from contextlib import closing
+
+from utils.store import load_cached, connect, store_metadata
+
+
+def test_metadata_is_stored_as_text_and_read_back(tmp_path):
+    path = str(tmp_path / "store_metadata.sqlite3")
+    metadata = {440: {"name": "Team Fortress 2", "genres": ["Action"]}, 570: None}
+
+    store_metadata(metadata, path=path)
+
+    with closing(connect(path)) as connection:
+        types = {row[0] for row in connection.execute("SELECT typeof(data) FROM app_metadata")}
+    assert types == {"text", "null"}
+    assert load_cached([440, 570], path=path) == metadata
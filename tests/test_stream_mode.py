@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from dify_plugin.entities.tool import ToolRuntime
+
+import utils.steam_api as steam_api
+from tools.steam_friend_list import SteamFriendListTool
+from tools.steam_owned_games import SteamOwnedGamesTool
+
+PIECE_SIZE = 256
+
+
+class FakeStreamResponse:
+    """Serves the body in small pieces and counts how many have been read."""
+
+    def __init__(self, body: dict):
+        self.status_code = 200
+        self.headers = {}
+        self.body = json.dumps(body).encode("utf-8")
+        self.pieces_read = 0
+        self.piece_count = -(-len(self.body) // PIECE_SIZE)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), PIECE_SIZE):
+            self.pieces_read += 1
+            yield self.body[start:start + PIECE_SIZE]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, body: dict):
+        self.response = FakeStreamResponse(body)
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        assert stream
+        return self.response
+
+
+@pytest.fixture
+def use_session(monkeypatch):
+    def install(body: dict) -> FakeStreamResponse:
+        session = FakeSession(body)
+        monkeypatch.setattr(steam_api, "_session", session)
+        return session.response
+
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+    yield install
+    steam_api.response_cache.clear()
+    steam_api.negative_cache.clear()
+
+
+def runtime() -> ToolRuntime:
+    return ToolRuntime(credentials={"api_key": "K"}, user_id="u", session_id=None)
+
+
+def test_owned_games_chunks_are_emitted_while_the_body_is_read(use_session):
+    games = [{"appid": 10 * (i + 1), "name": f"Game {i}", "playtime_forever": i} for i in range(1000)]
+    response = use_session({"response": {"game_count": len(games), "games": games}})
+    tool = SteamOwnedGamesTool(runtime=runtime(), session=None)
+
+    messages = tool._invoke({"steamid": "76561197960287930", "stream": "true", "chunk_size": "50"})
+    first = next(messages).message.json_object
+    assert response.pieces_read < response.piece_count
+    assert first["chunk"] == 1
+    assert [game["appid"] for game in first["games"]] == [game["appid"] for game in games[:50]]
+
+    rest = [message.message.json_object for message in messages]
+    assert response.pieces_read == response.piece_count
+    assert rest[-1]["chunk_count"] == 20
+    assert rest[-1]["game_count"] == 1000
+    assert sum(len(message["games"]) for message in [first, *rest]) == 1000
+
+
+def test_friend_list_chunks_are_emitted_while_the_body_is_read(use_session):
+    friends = [{"steamid": str(76561197960287930 + i), "relationship": "friend", "friend_since": i} for i in range(1000)]
+    response = use_session({"friendslist": {"friends": friends}})
+    tool = SteamFriendListTool(runtime=runtime(), session=None)
+
+    messages = tool._invoke({"steamid": "76561197960287930", "stream": "true", "chunk_size": "50"})
+    first = next(messages).message.json_object
+    assert response.pieces_read < response.piece_count
+    assert [friend["steamid"] for friend in first["friends"]] == [friend["steamid"] for friend in friends[:50]]
+
+    rest = [message.message.json_object for message in messages]
+    assert rest[-1]["friend_count"] == 1000
+    assert sum(len(message["friends"]) for message in [first, *rest]) == 1000
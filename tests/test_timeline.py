@@ -0,0 +1,78 @@
+import pytest
+from dify_plugin.entities.tool import ToolRuntime
+
+import tools.steam_achievement_timeline as timeline_tool
+import utils.timeline as timeline
+from utils.timeline import Timeline, UnlockEvent
+
+
+def make_timeline(apinames: list[str]) -> Timeline:
+    events = [UnlockEvent(1700000000 - i, 440, apiname, "Team Fortress 2") for i, apiname in enumerate(apinames)]
+    return Timeline(events, games_scanned=1, games_failed=0)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    def install(served: Timeline):
+        monkeypatch.setattr(timeline_tool, "get_timeline", lambda api_key, steamid, refresh=False: (served, None))
+
+    def no_schema(api_key, appid, language=""):
+        raise Exception("no schema")
+
+    monkeypatch.setattr(timeline_tool, "get_game_schema", no_schema)
+    return install
+
+
+def walk(tool_parameters: dict) -> list[dict]:
+    runtime = ToolRuntime(credentials={"api_key": "K"}, user_id="u", session_id=None)
+    tool = timeline_tool.SteamAchievementTimelineTool(runtime=runtime, session=None)
+    pages = []
+    cursor = None
+    while len(pages) < 50:
+        messages = list(tool._invoke({**tool_parameters, "steamid": "76561197960287930", "cursor": cursor}))
+        pages.append(messages[0].message.json_object)
+        cursor = pages[-1]["next_cursor"]
+        if cursor is None:
+            return pages
+    raise AssertionError("paging did not finish")
+
+
+def test_budget_truncated_pages_continue_after_the_last_returned_unlock(serve):
+    apinames = [f"ACH_{i}" for i in range(40)]
+    serve(make_timeline(apinames))
+
+    pages = walk({"page_size": "20", "max_output_bytes": "1200"})
+
+    assert len(pages) > 2
+    assert pages[0]["truncated"]["omitted_items"] > 0
+    assert [unlock["apiname"] for page in pages for unlock in page["unlocks"]] == apinames
+
+
+def test_unlock_larger_than_the_budget_does_not_stall_paging(serve):
+    apinames = ["ACH_0", "ACH_1", "X" * 2000, "ACH_3", "ACH_4"]
+    serve(make_timeline(apinames))
+
+    pages = walk({"page_size": "2", "max_output_bytes": "1200"})
+
+    returned = [unlock["apiname"] for page in pages for unlock in page["unlocks"]]
+    assert returned == ["ACH_0", "ACH_1", "ACH_3", "ACH_4"]
+    assert any(not page["unlocks"] and page["truncated"]["omitted_items"] for page in pages)
+
+
+def test_timeline_of_a_large_account_is_cached(monkeypatch):
+    builds = []
+
+    def build(api_key, steamid):
+        builds.append(steamid)
+        return make_timeline([f"ACH_{i}" for i in range(100000)])
+
+    monkeypatch.setattr(timeline, "build_timeline", build)
+    timeline._timelines.clear()
+    try:
+        timeline.get_timeline("K", "76561197960287930")
+        _, age = timeline.get_timeline("K", "76561197960287930")
+    finally:
+        timeline._timelines.clear()
+
+    assert builds == ["76561197960287930"]
+    assert age is not None
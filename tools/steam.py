@@ -1,11 +1,17 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age
+
 class SteamTool(Tool):
+    @profiled("steam")
+    @metered("steam")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves user information based on the provided Steam ID.
@@ -13,6 +19,8 @@ class SteamTool(Tool):
         Args:
             tool_parameters: A dictionary containing tool input parameters:
                 - steam_id (str): 17-digit Steam ID.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the result.
+                - max_items (str, optional): Upper bound on the number of returned profiles.
 
         Yields:
             ToolInvokeMessage: A JSON message containing user information.
@@ -31,17 +39,14 @@ class SteamTool(Tool):
         if not steam_id:
             raise Exception("Steam ID cannot be empty.")
 
+        budget = OutputBudget.from_parameters(tool_parameters)
+
         # 3. Call API to perform operation
         try:
-            url = f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={api_key}&steamids={steam_id}"
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age(
+                "ISteamUser/GetPlayerSummaries/v0002/",
+                {"key": api_key, "steamids": steam_id}
+            )
             
             # Check if player data exists
             if 'response' not in data or 'players' not in data['response']:
@@ -53,21 +58,32 @@ class SteamTool(Tool):
             
             # Get player data
             player = players[0]
-            result = {
-                "success": True,
-                "player": {
-                    "steamid": player.get('steamid'),
-                    "personaname": player.get('personaname'),
-                    "profileurl": player.get('profileurl'),
-                    "avatar": player.get('avatar'),
-                    "avatarmedium": player.get('avatarmedium'),
-                    "avatarfull": player.get('avatarfull'),
-                    "personastate": player.get('personastate'),
-                    "lastlogoff": player.get('lastlogoff'),
-                    "timecreated": player.get('timecreated'),
-                    "communityvisibilitystate": player.get('communityvisibilitystate')
-                }
-            }
+            result = {"success": True}
+
+            # The profile is the one budgeted item; it is left out when it does not fit
+            budget.charge(result)
+            player_info = budget.take({
+                "steamid": player.get('steamid'),
+                "personaname": player.get('personaname'),
+                "profileurl": player.get('profileurl'),
+                "avatar": player.get('avatar'),
+                "avatarmedium": player.get('avatarmedium'),
+                "avatarfull": player.get('avatarfull'),
+                "personastate": player.get('personastate'),
+                "lastlogoff": player.get('lastlogoff'),
+                "timecreated": player.get('timecreated'),
+                "communityvisibilitystate": player.get('communityvisibilitystate')
+            })
+            if player_info is not None:
+                result["player"] = player_info
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get player profile: {str(e)}")
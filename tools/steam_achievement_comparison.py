@@ -0,0 +1,188 @@
+from collections.abc import Generator
+from typing import Any
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.achievement_sets import build_bitsets, compare_bitsets, iter_bits, pairwise_overlap
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.schema import get_game_schema
+from utils.steam_api import get_json, run_concurrently
+
+# Upper bound on Steam IDs compared in one invocation
+MAX_PLAYERS = 300
+
+
+class SteamAchievementComparisonTool(Tool):
+    @profiled("steam_achievement_comparison")
+    @metered("steam_achievement_comparison")
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Compares the achievements several Steam users have unlocked in one game.
+
+        Achievements for every player are fetched concurrently and each player's
+        unlocks are packed into a bitset over the game's achievement index, so
+        the set comparisons run in the plugin instead of in the conversation.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - appid (str): The AppID of the game to compare achievements in.
+                - steamids (str): Comma-separated 64-bit Steam IDs of the players to compare.
+                - language (str, optional): The language for achievement names.
+                - top_pairs (str, optional): Number of player pairs with the most shared unlocks to list. Default is 10.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned achievement lists.
+                - max_items (str, optional): Upper bound on the number of returned achievement list entries.
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing the comparison.
+
+        Raises:
+            Exception: If the request fails, an exception with error information is thrown.
+        """
+        # 1. Get credentials from runtime
+        try:
+            api_key = self.runtime.credentials["api_key"]
+        except KeyError:
+            raise Exception("Steam API Key is not configured or invalid. Please provide it in the plugin settings.")
+
+        # 2. Get tool input parameters
+        appid = tool_parameters.get("appid")
+        if not appid:
+            raise Exception("Game AppID cannot be empty.")
+
+        steamids = []
+        for steamid in (tool_parameters.get("steamids") or "").split(","):
+            steamid = steamid.strip()
+            if steamid and steamid not in steamids:
+                steamids.append(steamid)
+
+        if len(steamids) < 2:
+            raise Exception("At least two different Steam IDs are required for a comparison.")
+        if len(steamids) > MAX_PLAYERS:
+            raise Exception(f"You can compare a maximum of {MAX_PLAYERS} Steam IDs at once.")
+
+        language = tool_parameters.get("language", "")
+        try:
+            top_pairs = int(tool_parameters.get("top_pairs", "") or 10)
+            if top_pairs < 0:
+                raise ValueError
+        except ValueError:
+            raise Exception("Invalid top_pairs value. It must be a non-negative integer.")
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        # 3. Call API to perform operation
+        try:
+            def fetch(player_id: str):
+                return lambda: get_json(
+                    "ISteamUserStats/GetPlayerAchievements/v0001/",
+                    {"appid": appid, "key": api_key, "steamid": player_id},
+                )
+
+            tasks = {player_id: fetch(player_id) for player_id in steamids}
+            tasks["schema"] = lambda: get_game_schema(api_key, appid, language)
+            responses = run_concurrently(tasks)
+
+            # Without a schema achievements are listed by API name only
+            schema = responses.pop("schema")
+            if isinstance(schema, Exception):
+                schema = None
+
+            player_achievements = {}
+            unavailable = []
+            game_name = (schema and schema.game_name) or f"AppID: {appid}"
+            for player_id in steamids:
+                data = responses[player_id]
+                if isinstance(data, Exception):
+                    unavailable.append({"steamid": player_id, "reason": str(data)})
+                    continue
+
+                playerstats = data.get("playerstats", {}) if isinstance(data, dict) else {}
+                if "error" in playerstats:
+                    unavailable.append({"steamid": player_id, "reason": playerstats.get("error", "Unknown error")})
+                    continue
+                if not playerstats.get("achievements"):
+                    unavailable.append({"steamid": player_id, "reason": "No achievement data found"})
+                    continue
+
+                player_achievements[player_id] = playerstats["achievements"]
+                game_name = playerstats.get("gameName") or game_name
+
+            if len(player_achievements) < 2:
+                reasons = "; ".join(f"{u['steamid']}: {u['reason']}" for u in unavailable)
+                raise Exception(f"Fewer than two players have achievement data available. {reasons}")
+
+            # Compare the unlock bitsets
+            apinames, bitsets = build_bitsets(player_achievements)
+            comparison = compare_bitsets(bitsets, len(apinames))
+
+            def describe(bit: int) -> dict:
+                apiname = apinames[bit]
+                info = {"apiname": apiname}
+                if schema is not None and apiname in schema.achievements:
+                    info["name"] = schema.achievements[apiname].display_name
+                return info
+
+            def within_budget(items: list[dict]) -> list[dict]:
+                kept = []
+                for index, item in enumerate(items):
+                    if budget.exhausted:
+                        budget.omit(len(items) - index)
+                        break
+                    item = budget.take(item)
+                    if item is not None:
+                        kept.append(item)
+                return kept
+
+            result = {
+                "success": True,
+                "game": {
+                    "appid": appid,
+                    "name": game_name
+                },
+                "achievement_count": len(apinames),
+                "players_compared": len(bitsets),
+                "players": [
+                    {
+                        "steamid": player_id,
+                        "unlocked_count": bitset.bit_count(),
+                        "completion_percentage": round(bitset.bit_count() / len(apinames) * 100, 2) if apinames else 0,
+                        "unique_count": (bitset & comparison["only_one"]).bit_count()
+                    }
+                    for player_id, bitset in bitsets.items()
+                ],
+                "unlocked_by_everyone": [],
+                "unlocked_by_nobody": [],
+                "unlocked_by_only_one": []
+            }
+
+            if top_pairs:
+                result["most_shared_pairs"] = [
+                    {"steamids": [first, second], "shared_count": shared, "jaccard": round(jaccard, 3)}
+                    for first, second, shared, jaccard in pairwise_overlap(bitsets)[:top_pairs]
+                ]
+
+            if unavailable:
+                result["unavailable"] = unavailable
+
+            # The envelope, per-player counts and pairs included, counts against max_output_bytes too
+            budget.charge(result)
+
+            # Lists are offered to the budget most distinctive first
+            result["unlocked_by_only_one"] = within_budget([
+                {**describe(bit), "steamid": comparison["owners"][bit]}
+                for bit in iter_bits(comparison["only_one"])
+            ])
+            result["unlocked_by_everyone"] = within_budget([describe(bit) for bit in iter_bits(comparison["everyone"])])
+            result["unlocked_by_nobody"] = within_budget([describe(bit) for bit in iter_bits(comparison["nobody"])])
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+        except Exception as e:
+            raise Exception(f"Failed to compare achievements: {str(e)}")
+
+        # 4. Return result
+        yield self.create_json_message(result)
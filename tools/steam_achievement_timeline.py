@@ -0,0 +1,142 @@
+from collections.abc import Generator
+from typing import Any
+import datetime
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.schema import get_game_schema
+from utils.steam_api import run_concurrently
+from utils.timeline import encode_cursor, get_timeline
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class SteamAchievementTimelineTool(Tool):
+    @profiled("steam_achievement_timeline")
+    @metered("steam_achievement_timeline")
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Retrieves a Steam user's achievement unlocks across all owned games, newest first, one page at a time.
+
+        The first page fetches unlocks for every played game with stats concurrently
+        and merges them into one timeline. Following pages are served from the
+        cached timeline using the cursor returned by the previous page.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - steamid (str): The 64-bit Steam ID of the user.
+                - cursor (str, optional): The next_cursor value of the previous page. Omit for the first page.
+                - page_size (str, optional): Number of unlocks per page. Default is 50, maximum 500.
+                - language (str, optional): The language for achievement names and descriptions.
+                - refresh (str, optional): Whether to rebuild the timeline instead of using the cached one. Default is false.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned unlocks.
+                - max_items (str, optional): Upper bound on the number of returned unlocks.
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing one page of the unlock timeline.
+
+        Raises:
+            Exception: If the request fails, an exception with error information is thrown.
+        """
+        # 1. Get credentials from runtime
+        try:
+            api_key = self.runtime.credentials["api_key"]
+        except KeyError:
+            raise Exception("Steam API Key is not configured or invalid. Please provide it in the plugin settings.")
+
+        # 2. Get tool input parameters
+        steamid = tool_parameters.get("steamid")
+        if not steamid:
+            raise Exception("Steam ID cannot be empty.")
+
+        cursor = tool_parameters.get("cursor") or None
+        language = tool_parameters.get("language", "")
+        refresh = str(tool_parameters.get("refresh", "false")).lower() == "true"
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        try:
+            page_size = int(tool_parameters.get("page_size", "") or DEFAULT_PAGE_SIZE)
+            if page_size <= 0:
+                raise ValueError
+        except ValueError:
+            raise Exception("Invalid page_size value. It must be a positive integer.")
+        page_size = min(page_size, MAX_PAGE_SIZE)
+
+        # 3. Call API to perform operation
+        try:
+            timeline, timeline_age = get_timeline(api_key, steamid, refresh)
+            events, next_cursor = timeline.page(cursor, page_size)
+
+            if not timeline.events:
+                yield self.create_text_message(
+                    f"No unlocked achievements found for Steam user {steamid}. "
+                    "The user's game details may be private, or none of the played games have achievements."
+                )
+                return
+
+            # Localize only the games on this page; schemas are cached per game and language
+            appids = {event.appid for event in events}
+            schemas = run_concurrently({appid: (lambda appid=appid: get_game_schema(api_key, appid, language)) for appid in appids})
+            # Without a schema an unlock is returned with its API name only
+            schemas = {appid: schema for appid, schema in schemas.items() if not isinstance(schema, Exception)}
+
+            result = {
+                "success": True,
+                "steamid": steamid,
+                "total_unlocks": len(timeline.events),
+                "games_scanned": timeline.games_scanned,
+                "unlocks": [],
+                "next_cursor": None
+            }
+            if timeline.games_failed:
+                result["games_unavailable"] = timeline.games_failed
+            # The envelope counts against max_output_bytes too; the reserve covers the cursor
+            budget.charge(result)
+
+            unlocks = result["unlocks"]
+            for index, event in enumerate(events):
+                if budget.exhausted:
+                    budget.omit(len(events) - index)
+                    break
+
+                schema = schemas.get(event.appid)
+                unlock = {
+                    "unlocktime_timestamp": event.unlocktime,
+                    "unlocktime_date": datetime.datetime.fromtimestamp(event.unlocktime).strftime('%Y-%m-%d %H:%M:%S') if event.unlocktime else None,
+                    "appid": event.appid,
+                    "game_name": event.game_name or (schema.game_name if schema is not None else None),
+                    "apiname": event.apiname
+                }
+                if schema is not None:
+                    unlock.update(schema.describe_achievement(event.apiname, True))
+
+                unlock = budget.take(unlock, text_field="description")
+                if unlock is None:
+                    continue
+                unlocks.append(unlock)
+                last_returned = event
+
+            # A budget-shortened page continues after its last returned unlock, so nothing is skipped;
+            # an unlock too large for the budget on its own is passed over so paging still advances
+            truncated = budget.report()
+            if budget.omitted_items and events:
+                next_cursor = encode_cursor(last_returned if unlocks else events[0])
+
+            result["next_cursor"] = next_cursor
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag pages served from a previously merged timeline
+            if timeline_age is not None:
+                result["timeline_age_seconds"] = round(timeline_age)
+
+        except Exception as e:
+            raise Exception(f"Failed to get achievement timeline: {str(e)}")
+
+        # 4. Return result
+        yield self.create_json_message(result)
@@ -1,11 +1,17 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age
+
 class SteamAchievementsTool(Tool):
+    @profiled("steam_achievements")
+    @metered("steam_achievements")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves global achievement completion percentage data for a specific game.
@@ -13,6 +19,8 @@ class SteamAchievementsTool(Tool):
         Args:
             tool_parameters: A dictionary containing tool input parameters:
                 - gameid (str): The AppID of the game.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the game achievement percentage data.
@@ -31,17 +39,14 @@ class SteamAchievementsTool(Tool):
         if not gameid:
             raise Exception("Game AppID cannot be empty.")
 
+        budget = OutputBudget.from_parameters(tool_parameters)
+
         # 3. Call API to perform operation
         try:
-            url = f"http://api.steampowered.com/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v0002/?gameid={gameid}&format=json"
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age(
+                "ISteamUserStats/GetGlobalAchievementPercentagesForApp/v0002/",
+                {"gameid": gameid, "format": "json"}
+            )
             
             # Check if achievement data exists
             if 'achievementpercentages' not in data or 'achievements' not in data['achievementpercentages']:
@@ -62,18 +67,35 @@ class SteamAchievementsTool(Tool):
                 "achievements": []
             }
             
+            # Sort by completion rate (high to low) before building, so a budget keeps the most common ones
+            achievements = sorted(achievements,
+                                  key=lambda x: x.get('percent', 0),
+                                  reverse=True)
+            
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process each achievement
-            for achievement in achievements:
+            for index, achievement in enumerate(achievements):
+                if budget.exhausted:
+                    budget.omit(len(achievements) - index)
+                    break
+
                 achievement_data = {
                     "name": achievement.get('name'),
                     "percent": achievement.get('percent')
                 }
-                result["achievements"].append(achievement_data)
-            
-            # Sort by completion rate (high to low)
-            result["achievements"] = sorted(result["achievements"], 
-                                          key=lambda x: x.get('percent', 0),
-                                          reverse=True)
+                achievement_data = budget.take(achievement_data)
+                if achievement_data is not None:
+                    result["achievements"].append(achievement_data)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get game achievement data: {str(e)}")
@@ -0,0 +1,165 @@
+from collections.abc import Generator
+from typing import Any
+import importlib
+import json
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.budget import OutputBudget
+from utils.steam_api import MAX_WORKERS, run_concurrently
+
+# Tools that can be batched, by the names they are registered under. Classes are
+# imported on use: a Tool subclass in this module's namespace would make the
+# plugin loader find more than one tool here.
+BATCHABLE_TOOLS = {
+    "steam": ("tools.steam", "SteamTool"),
+    "steam_achievement_comparison": ("tools.steam_achievement_comparison", "SteamAchievementComparisonTool"),
+    "steam_achievement_timeline": ("tools.steam_achievement_timeline", "SteamAchievementTimelineTool"),
+    "steam_achievements": ("tools.steam_achievements", "SteamAchievementsTool"),
+    "steam_friend_list": ("tools.steam_friend_list", "SteamFriendListTool"),
+    "steam_news": ("tools.steam_news", "SteamNewsTool"),
+    "steam_owned_games": ("tools.steam_owned_games", "SteamOwnedGamesTool"),
+    "steam_player_achievements": ("tools.steam_player_achievements", "SteamPlayerAchievementsTool"),
+    "steam_player_details": ("tools.steam_player_details", "SteamPlayerDetailsTool"),
+    "steam_player_dossier": ("tools.steam_player_dossier", "SteamPlayerDossierTool"),
+    "steam_playtime_trends": ("tools.steam_playtime_trends", "SteamPlaytimeTrendsTool"),
+    "steam_presence_watch": ("tools.steam_presence_watch", "SteamPresenceWatchTool"),
+    "steam_recently_played": ("tools.steam_recently_played", "SteamRecentlyPlayedTool"),
+    "steam_user_stats": ("tools.steam_user_stats", "SteamUserStatsTool"),
+}
+
+# Upper bound on entries in one batch
+MAX_ENTRIES = 50
+
+DEFAULT_CONCURRENCY = 8
+
+# Upper bound on the serialized size of the combined results when the call sets none
+DEFAULT_MAX_OUTPUT_BYTES = 512 * 1024
+
+# Bytes set aside per entry for its wrapper and its tool's envelope, and the
+# smallest output share an entry is given however many entries there are
+ENTRY_OVERHEAD_BYTES = 512
+MIN_ENTRY_BYTES = 4 * 1024
+
+
+def collect_messages(messages: Generator[ToolInvokeMessage, None, None]) -> list[Any]:
+    """Unwraps a tool's JSON and text messages into plain values."""
+    values = []
+    for message in messages:
+        if hasattr(message.message, "json_object"):
+            values.append(message.message.json_object)
+        elif hasattr(message.message, "text"):
+            values.append(message.message.text)
+    return values
+
+
+class SteamBatchTool(Tool):
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Runs many calls of the other Steam tools concurrently in one invocation.
+
+        Every entry runs the named tool with its own parameters and the same
+        credentials, through the shared connection pool. A failing entry is
+        reported in place and does not affect the others. Entries that fan out
+        themselves share the batch's workers. Each entry without its own
+        max_output_bytes gets an equal share of the batch's, so its tool cuts
+        a large result down instead of one entry using up the whole budget;
+        the combined results are then offered to the budget in input order.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - entries (str): JSON list of {"tool": name, "parameters": {...}} objects.
+                - max_concurrency (str, optional): Maximum number of entries running at once. Default is 8.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the combined results. Default is 512 KiB.
+                - max_items (str, optional): Upper bound on the number of returned entry results.
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing one result per entry, in input order.
+
+        Raises:
+            Exception: If the entries are invalid.
+        """
+        # 1. Get tool input parameters
+        try:
+            entries = json.loads(tool_parameters.get("entries") or "[]")
+        except ValueError:
+            raise Exception("entries must be a JSON list of {\"tool\": ..., \"parameters\": {...}} objects.")
+
+        if not isinstance(entries, list) or not entries:
+            raise Exception("entries must be a non-empty JSON list of {\"tool\": ..., \"parameters\": {...}} objects.")
+        if len(entries) > MAX_ENTRIES:
+            raise Exception(f"A batch can contain a maximum of {MAX_ENTRIES} entries.")
+
+        try:
+            max_concurrency = int(tool_parameters.get("max_concurrency", "") or DEFAULT_CONCURRENCY)
+            if max_concurrency <= 0:
+                raise ValueError
+        except ValueError:
+            raise Exception("Invalid max_concurrency value. It must be a positive integer.")
+        max_concurrency = min(max_concurrency, MAX_WORKERS)
+
+        budget = OutputBudget.from_parameters(tool_parameters)
+        if budget.max_output_bytes is None:
+            budget.max_output_bytes = DEFAULT_MAX_OUTPUT_BYTES
+
+        # 2. Validate every entry before running any of them
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict) or entry.get("tool") not in BATCHABLE_TOOLS:
+                raise Exception(f"Entry {index} must name one of these tools: {', '.join(BATCHABLE_TOOLS)}.")
+            if not isinstance(entry.get("parameters", {}), dict):
+                raise Exception(f"Entry {index} parameters must be a JSON object.")
+            # A watch with a duration would hold the whole batch for up to ten minutes
+            if entry["tool"] == "steam_presence_watch" and str(entry.get("parameters", {}).get("duration") or 0) != "0":
+                raise Exception(f"Entry {index}: steam_presence_watch runs a single poll inside a batch; remove its duration.")
+
+        # 3. Run all entries concurrently
+        entry_share = max(budget.max_output_bytes // len(entries) - ENTRY_OVERHEAD_BYTES, MIN_ENTRY_BYTES)
+
+        def run_entry(entry: dict):
+            module_name, class_name = BATCHABLE_TOOLS[entry["tool"]]
+            tool_class = getattr(importlib.import_module(module_name), class_name)
+            tool = tool_class(runtime=self.runtime, session=self.session)
+            # Parameters are passed as strings, the same way Dify passes them to the tools; unset ones are left out
+            parameters = {
+                name: value if isinstance(value, str) else json.dumps(value)
+                for name, value in entry.get("parameters", {}).items()
+                if value is not None
+            }
+            # An entry without its own size limit is cut down to its share by its tool rather than dropped whole
+            parameters.setdefault("max_output_bytes", str(entry_share))
+            return lambda: collect_messages(tool._invoke(parameters))
+
+        outcomes = run_concurrently({index: run_entry(entry) for index, entry in enumerate(entries)}, max_workers=max_concurrency)
+
+        # 4. Format result in input order
+        results = []
+        for index, entry in enumerate(entries):
+            if budget.exhausted:
+                budget.omit(len(entries) - index)
+                break
+
+            outcome = outcomes[index]
+            item = {"index": index, "tool": entry["tool"]}
+            if isinstance(outcome, Exception):
+                item["success"] = False
+                item["error"] = str(outcome)
+            else:
+                item["success"] = True
+                item["result"] = outcome[0] if len(outcome) == 1 else outcome
+            item = budget.take(item)
+            if item is not None:
+                results.append(item)
+
+        result = {
+            "success": True,
+            "entry_count": len(entries),
+            "failed_count": sum(1 for index in range(len(entries)) if isinstance(outcomes[index], Exception)),
+            "results": results
+        }
+        truncated = budget.report()
+        if truncated:
+            result["truncated"] = truncated
+
+        # 5. Return result
+        yield self.create_json_message(result)
@@ -1,12 +1,46 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 import datetime
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.json_stream import iter_json_array
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age, open_stream
+
+# Default number of friends per message in streaming mode
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bytes read from the upstream body at a time in streaming mode
+STREAM_READ_SIZE = 64 * 1024
+
+
+class FriendRecord:
+    """Compact in-memory form of one GetFriendList entry used in streaming mode."""
+
+    __slots__ = ("steamid", "relationship", "friend_since")
+
+    def __init__(self, friend: dict):
+        self.steamid = friend.get('steamid')
+        self.relationship = friend.get('relationship')
+        self.friend_since = friend.get('friend_since', 0)
+
+    def to_dict(self) -> dict:
+        friend_since_date = datetime.datetime.fromtimestamp(self.friend_since).strftime('%Y-%m-%d %H:%M:%S') if self.friend_since else None
+        return {
+            "steamid": self.steamid,
+            "relationship": self.relationship,
+            "friend_since_timestamp": self.friend_since,
+            "friend_since_date": friend_since_date
+        }
+
+
 class SteamFriendListTool(Tool):
+    @profiled("steam_friend_list")
+    @metered("steam_friend_list")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves the friend list of a specified Steam user. Note: The user's Steam profile must be set to "Public" to access the friend list.
@@ -15,6 +49,10 @@ class SteamFriendListTool(Tool):
             tool_parameters: A dictionary containing tool input parameters:
                 - steamid (str): The 64-bit Steam ID of the user whose friend list to retrieve.
                 - relationship (str, optional): Relationship filter. Possible values: all, friend. Default is friend.
+                - stream (str, optional): Parse the response incrementally and return friends in chunked messages.
+                - chunk_size (str, optional): Number of friends per message in streaming mode. Default is 1000.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the user's friend list.
@@ -38,23 +76,26 @@ class SteamFriendListTool(Tool):
         if relationship not in ["all", "friend"]:
             raise Exception("The relationship parameter must be 'all' or 'friend'.")
 
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        stream = tool_parameters.get("stream", "false").lower() == "true"
+        if stream:
+            chunk_size = tool_parameters.get("chunk_size", "") or DEFAULT_CHUNK_SIZE
+            try:
+                chunk_size = int(chunk_size)
+                if chunk_size <= 0:
+                    raise ValueError
+            except ValueError:
+                raise Exception("Invalid chunk_size value. It must be a positive integer.")
+            yield from self._invoke_stream(api_key, steamid, relationship, chunk_size, budget)
+            return
+
         # 3. Call API to perform operation
         try:
-            url = f"http://api.steampowered.com/ISteamUser/GetFriendList/v0001/?key={api_key}&steamid={steamid}&relationship={relationship}"
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code == 401:
-                raise Exception("API key is invalid or unauthorized.")
-            elif response.status_code == 403:
-                raise Exception("Access denied. The API key may not have sufficient permissions.")
-            elif response.status_code == 404:
-                raise Exception("No data found. The user might not exist or the profile is not public.")
-            elif response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age(
+                "ISteamUser/GetFriendList/v0001/",
+                {"key": api_key, "steamid": steamid, "relationship": relationship}
+            )
             
             # Check if friend data exists
             if 'friendslist' not in data or 'friends' not in data['friendslist']:
@@ -75,8 +116,20 @@ class SteamFriendListTool(Tool):
                 "friends": []
             }
             
+            # Sort by friendship establishment time (newest to oldest) before building, so a budget keeps the newest
+            friends = sorted(friends,
+                             key=lambda x: x.get('friend_since', 0),
+                             reverse=True)
+            
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process each friend's information
-            for friend in friends:
+            for index, friend in enumerate(friends):
+                if budget.exhausted:
+                    budget.omit(len(friends) - index)
+                    break
+
                 # Convert Unix timestamp to readable format
                 friend_since_timestamp = friend.get('friend_since', 0)
                 friend_since_date = datetime.datetime.fromtimestamp(friend_since_timestamp).strftime('%Y-%m-%d %H:%M:%S') if friend_since_timestamp else None
@@ -87,15 +140,77 @@ class SteamFriendListTool(Tool):
                     "friend_since_timestamp": friend_since_timestamp,
                     "friend_since_date": friend_since_date
                 }
-                result["friends"].append(friend_info)
-            
-            # Sort by friendship establishment time (newest to oldest)
-            result["friends"] = sorted(result["friends"], 
-                                     key=lambda x: x.get('friend_since_timestamp', 0),
-                                     reverse=True)
+                friend_info = budget.take(friend_info)
+                if friend_info is not None:
+                    result["friends"].append(friend_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get friend list: {str(e)}")
 
         # 4. Return result
-        yield self.create_json_message(result)
\ No newline at end of file
+        yield self.create_json_message(result)
+
+    def _invoke_stream(self, api_key: str, steamid: str, relationship: str, chunk_size: int, budget: OutputBudget) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Streams the friend list with flat peak memory.
+
+        The response body is decoded one friend at a time and friends are
+        emitted in upstream order, as a sequence of JSON messages of at most
+        chunk_size friends each, while the rest of the body is still being
+        read. Only the current chunk is held in memory. The last message
+        carries the friend_count and chunk_count; the output budget spans all
+        messages and the last message reports what was omitted.
+        """
+        params = {"key": api_key, "steamid": steamid, "relationship": relationship}
+
+        def new_message(chunk: int) -> dict:
+            return {"success": True, "steamid": steamid, "relationship_filter": relationship, "chunk": chunk, "friends": []}
+
+        try:
+            response = open_stream("ISteamUser/GetFriendList/v0001/", params)
+            try:
+                friend_count = 0
+                message = new_message(1)
+                # Each message's envelope counts against max_output_bytes too; the first carries the reserve
+                budget.charge(message)
+                for friend in iter_json_array(response.iter_content(STREAM_READ_SIZE), "friends"):
+                    friend_count += 1
+                    if budget.exhausted:
+                        # Keep counting, so the last message reports the list size and what was omitted
+                        budget.omit(1)
+                        continue
+
+                    if len(message["friends"]) == chunk_size:
+                        yield self.create_json_message(message)
+                        message = new_message(message["chunk"] + 1)
+                        budget.charge(message, reserve=False)
+                        if budget.exhausted:
+                            budget.omit(1)
+                            continue
+
+                    friend_info = budget.take(FriendRecord(friend).to_dict())
+                    if friend_info is not None:
+                        message["friends"].append(friend_info)
+            finally:
+                response.close()
+        except Exception as e:
+            raise Exception(f"Failed to get friend list: {str(e)}")
+
+        if not friend_count:
+            yield self.create_text_message(f"Steam ID {steamid} has no friends or the profile is not public")
+            return
+
+        message["friend_count"] = friend_count
+        message["chunk_count"] = message["chunk"]
+        truncated = budget.report()
+        if truncated:
+            message["truncated"] = truncated
+        yield self.create_json_message(message)
@@ -1,11 +1,17 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age
+
 class SteamNewsTool(Tool):
+    @profiled("steam_news")
+    @metered("steam_news")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves the latest news for a specified game.
@@ -15,6 +21,8 @@ class SteamNewsTool(Tool):
                 - appid (str): The AppID of the game.
                 - count (str, optional): Number of news entries to return. Default is 3.
                 - maxlength (str, optional): Maximum length of each news entry. Default is 300.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the game news.
@@ -36,18 +44,14 @@ class SteamNewsTool(Tool):
         # Get optional parameters with default values
         count = tool_parameters.get("count", "3")
         maxlength = tool_parameters.get("maxlength", "300")
+        budget = OutputBudget.from_parameters(tool_parameters)
 
         # 3. Call API to perform operation
         try:
-            url = f"http://api.steampowered.com/ISteamNews/GetNewsForApp/v0002/?appid={appid}&count={count}&maxlength={maxlength}&format=json"
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age(
+                "ISteamNews/GetNewsForApp/v0002/",
+                {"appid": appid, "count": count, "maxlength": maxlength, "format": "json"}
+            )
             
             # Check if news data exists
             if 'appnews' not in data or 'newsitems' not in data['appnews']:
@@ -69,8 +73,15 @@ class SteamNewsTool(Tool):
                 "newsitems": []
             }
             
-            # Process each news item
-            for item in newsitems:
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
+            # Process each news item, newest first as returned by Steam
+            for index, item in enumerate(newsitems):
+                if budget.exhausted:
+                    budget.omit(len(newsitems) - index)
+                    break
+
                 news_item = {
                     "gid": item.get('gid'),
                     "title": item.get('title'),
@@ -81,7 +92,17 @@ class SteamNewsTool(Tool):
                     "feedlabel": item.get('feedlabel'),
                     "feed_name": item.get('feed_name')
                 }
-                result["newsitems"].append(news_item)
+                news_item = budget.take(news_item, text_field="contents")
+                if news_item is not None:
+                    result["newsitems"].append(news_item)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get game news: {str(e)}")
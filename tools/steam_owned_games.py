@@ -1,12 +1,77 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 import json
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.json_stream import iter_json_array
+from utils.library_stats import get_library, summarize
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age, open_stream
+from utils.store import genre_rollup, get_metadata
+
+# Default number of games per message in streaming mode
+DEFAULT_CHUNK_SIZE = 500
+
+# Bytes read from the upstream body at a time in streaming mode
+STREAM_READ_SIZE = 64 * 1024
+
+# Default number of most played games listed in analytics mode
+DEFAULT_TOP_N = 10
+
+
+def readable_playtime(minutes: int) -> str:
+    hours = minutes / 60
+    if hours < 1:
+        return f"{minutes} minutes"
+    return f"{hours:.1f} hours"
+
+
+class OwnedGameRecord:
+    """Compact in-memory form of one GetOwnedGames entry used in streaming mode."""
+
+    __slots__ = ("appid", "name", "playtime_forever", "playtime_2weeks", "img_icon_url", "img_logo_url", "has_community_visible_stats")
+
+    def __init__(self, game: dict, include_appinfo: bool):
+        self.appid = game.get('appid')
+        self.playtime_forever = game.get('playtime_forever', 0)
+        self.playtime_2weeks = game.get('playtime_2weeks')
+        self.name = game.get('name') if include_appinfo else None
+        self.img_icon_url = game.get('img_icon_url') if include_appinfo else None
+        self.img_logo_url = game.get('img_logo_url') if include_appinfo else None
+        self.has_community_visible_stats = game.get('has_community_visible_stats')
+
+    def to_dict(self, steamid: str) -> dict:
+        game_info = {
+            "appid": self.appid,
+            "playtime_forever": self.playtime_forever,
+        }
+        if self.playtime_2weeks is not None:
+            game_info["playtime_2weeks"] = self.playtime_2weeks
+        if self.name is not None:
+            game_info["name"] = self.name
+        if self.img_icon_url:
+            game_info["img_icon_url"] = self.img_icon_url
+            game_info["icon_url"] = f"http://media.steampowered.com/steamcommunity/public/images/apps/{self.appid}/{self.img_icon_url}.jpg"
+        if self.img_logo_url:
+            game_info["img_logo_url"] = self.img_logo_url
+            game_info["logo_url"] = f"http://media.steampowered.com/steamcommunity/public/images/apps/{self.appid}/{self.img_logo_url}.jpg"
+        if self.has_community_visible_stats is not None:
+            game_info["has_community_visible_stats"] = self.has_community_visible_stats
+            if self.has_community_visible_stats:
+                game_info["stats_url"] = f"http://steamcommunity.com/profiles/{steamid}/stats/{self.appid}"
+        game_info["playtime_readable"] = readable_playtime(self.playtime_forever)
+        if self.playtime_2weeks is not None:
+            game_info["playtime_2weeks_readable"] = readable_playtime(self.playtime_2weeks)
+        return game_info
+
+
 class SteamOwnedGamesTool(Tool):
+    @profiled("steam_owned_games")
+    @metered("steam_owned_games")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves a list of games owned by a Steam user.
@@ -17,6 +82,13 @@ class SteamOwnedGamesTool(Tool):
                 - include_appinfo (str, optional): Include game name and logo information.
                 - include_played_free_games (str, optional): Include free games that have been played.
                 - appids_filter (str, optional): JSON array of appids to filter the results.
+                - stream (str, optional): Parse the response incrementally and return games in chunked messages.
+                - chunk_size (str, optional): Number of games per message in streaming mode. Default is 500.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
+                - enrich (str, optional): Add store metadata per game and playtime per genre. Ignored in streaming mode.
+                - analytics (str, optional): Return aggregate playtime statistics instead of the game list.
+                - top_n (str, optional): Number of most played games listed in analytics mode. Default is 10.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the user's owned games.
@@ -51,39 +123,50 @@ class SteamOwnedGamesTool(Tool):
             except json.JSONDecodeError:
                 raise Exception("Invalid JSON format for appids_filter. Example: [440, 570, 730]")
 
+        budget = OutputBudget.from_parameters(tool_parameters)
+        enrich = tool_parameters.get("enrich", "false").lower() == "true"
+
+        # Analytics summarizes the whole library, so the filter, streaming and budget do not apply
+        if tool_parameters.get("analytics", "false").lower() == "true":
+            top_n = tool_parameters.get("top_n", "") or DEFAULT_TOP_N
+            try:
+                top_n = int(top_n)
+                if top_n <= 0:
+                    raise ValueError
+            except ValueError:
+                raise Exception("Invalid top_n value. It must be a positive integer.")
+            yield from self._invoke_analytics(api_key, steamid, include_played_free_games, top_n)
+            return
+
+        # Streaming keeps memory flat for very large libraries; filtered results are small anyway
+        stream = tool_parameters.get("stream", "false").lower() == "true"
+        if stream and not appids_filter:
+            chunk_size = tool_parameters.get("chunk_size", "") or DEFAULT_CHUNK_SIZE
+            try:
+                chunk_size = int(chunk_size)
+                if chunk_size <= 0:
+                    raise ValueError
+            except ValueError:
+                raise Exception("Invalid chunk_size value. It must be a positive integer.")
+            yield from self._invoke_stream(api_key, steamid, include_appinfo, include_played_free_games, chunk_size, budget)
+            return
+
         # 3. Call API to perform operation
         try:
-            # Build base URL with required parameters
-            url = f"http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/?key={api_key}&steamid={steamid}&format=json"
+            # Build API parameters
+            params = {"key": api_key, "steamid": steamid, "format": "json"}
             
             # Add optional parameters
             if include_appinfo:
-                url += "&include_appinfo=1"
+                params["include_appinfo"] = 1
             if include_played_free_games:
-                url += "&include_played_free_games=1"
-            
-            # If appids_filter is provided, it needs to be sent as POST data
-            headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-            data = None
+                params["include_played_free_games"] = 1
             
-            if appids_filter:
-                data = {"appids_filter": appids_filter}
-                response = requests.post(url, data=json.dumps(data), headers=headers)
-            else:
-                response = requests.get(url)
+            # Array parameters are passed as indexed query keys
+            for index, filter_appid in enumerate(appids_filter):
+                params[f"appids_filter[{index}]"] = filter_appid
             
-            # Check response status code
-            if response.status_code == 401:
-                raise Exception("API key is invalid or unauthorized.")
-            elif response.status_code == 403:
-                raise Exception("Access denied. The API key may not have sufficient permissions.")
-            elif response.status_code == 404:
-                raise Exception("No data found. The user might not exist or the profile is not public.")
-            elif response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age("IPlayerService/GetOwnedGames/v0001/", params)
             
             # Check if the response format is valid
             if 'response' not in data:
@@ -109,8 +192,30 @@ class SteamOwnedGamesTool(Tool):
                 "games": []
             }
             
+            # Sort games by playtime (most played first) before building, so a budget keeps the most played
+            games = sorted(games,
+                           key=lambda x: x.get('playtime_forever', 0),
+                           reverse=True)
+
+            # Store metadata comes from the local cache; misses are fetched most played first
+            metadata = {}
+            if enrich:
+                try:
+                    metadata, pending = get_metadata([game.get('appid') for game in games])
+                    result["genre_playtime"] = genre_rollup(games, metadata)
+                    result["metadata_coverage"] = {"enriched": len(metadata), "pending": pending}
+                except Exception as e:
+                    result["metadata_error"] = str(e)
+            
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process each game
-            for game in games:
+            for index, game in enumerate(games):
+                if budget.exhausted:
+                    budget.omit(len(games) - index)
+                    break
+
                 game_info = {
                     "appid": game.get('appid'),
                     "playtime_forever": game.get('playtime_forever', 0),  # Total playtime in minutes
@@ -144,35 +249,111 @@ class SteamOwnedGamesTool(Tool):
                     if game.get('has_community_visible_stats'):
                         game_info["stats_url"] = f"http://steamcommunity.com/profiles/{steamid}/stats/{game.get('appid')}"
                 
-                # Add to games list
-                result["games"].append(game_info)
-            
-            # Sort games by playtime (most played first)
-            result["games"] = sorted(result["games"], 
-                                   key=lambda x: x.get('playtime_forever', 0),
-                                   reverse=True)
-            
-            # Add human-readable playtime for better readability
-            for game in result["games"]:
-                minutes_forever = game.get('playtime_forever', 0)
-                hours_forever = minutes_forever / 60
-                
-                if hours_forever < 1:
-                    game["playtime_readable"] = f"{minutes_forever} minutes"
-                else:
-                    game["playtime_readable"] = f"{hours_forever:.1f} hours"
+                # Add human-readable playtime for better readability
+                game_info["playtime_readable"] = readable_playtime(game_info["playtime_forever"])
+                if "playtime_2weeks" in game_info:
+                    game_info["playtime_2weeks_readable"] = readable_playtime(game_info["playtime_2weeks"])
+
+                if game.get('appid') in metadata:
+                    game_info["store"] = metadata[game.get('appid')]
                 
-                if "playtime_2weeks" in game:
-                    minutes_2weeks = game.get('playtime_2weeks', 0)
-                    hours_2weeks = minutes_2weeks / 60
-                    
-                    if hours_2weeks < 1:
-                        game["playtime_2weeks_readable"] = f"{minutes_2weeks} minutes"
-                    else:
-                        game["playtime_2weeks_readable"] = f"{hours_2weeks:.1f} hours"
+                # Add to games list
+                game_info = budget.take(game_info)
+                if game_info is not None:
+                    result["games"].append(game_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get owned games: {str(e)}")
 
         # 4. Return result
-        yield self.create_json_message(result)
\ No newline at end of file
+        yield self.create_json_message(result)
+
+    def _invoke_analytics(self, api_key: str, steamid: str, include_played_free_games: bool, top_n: int) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Summarizes the library from columnar playtime arrays.
+
+        The columns are cached per player, so repeated summaries of the same
+        library skip the upstream call and the per-game conversion.
+        """
+        try:
+            columns, age = get_library(api_key, steamid, include_played_free_games)
+        except Exception as e:
+            raise Exception(f"Failed to get owned games: {str(e)}")
+
+        if columns is None:
+            yield self.create_text_message("Unable to retrieve game list. The user's profile might be private.")
+            return
+
+        result = {"success": True, "steamid": steamid, **summarize(columns, top_n)}
+        if age is not None:
+            result["cache_age_seconds"] = round(age)
+        yield self.create_json_message(result)
+
+    def _invoke_stream(self, api_key: str, steamid: str, include_appinfo: bool, include_played_free_games: bool, chunk_size: int, budget: OutputBudget) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Streams the owned games list with flat peak memory.
+
+        The response body is decoded one game at a time and games are emitted
+        in upstream order, as a sequence of JSON messages of at most chunk_size
+        games each, while the rest of the body is still being read. Only the
+        current chunk is held in memory. The last message carries the
+        game_count and chunk_count; the output budget spans all messages and
+        the last message reports what was omitted.
+        """
+        params = {"key": api_key, "steamid": steamid, "format": "json"}
+        if include_appinfo:
+            params["include_appinfo"] = 1
+        if include_played_free_games:
+            params["include_played_free_games"] = 1
+
+        def new_message(chunk: int) -> dict:
+            return {"success": True, "steamid": steamid, "chunk": chunk, "games": []}
+
+        try:
+            response = open_stream("IPlayerService/GetOwnedGames/v0001/", params)
+            try:
+                game_count = 0
+                message = new_message(1)
+                # Each message's envelope counts against max_output_bytes too; the first carries the reserve
+                budget.charge(message)
+                for game in iter_json_array(response.iter_content(STREAM_READ_SIZE), "games"):
+                    game_count += 1
+                    if budget.exhausted:
+                        # Keep counting, so the last message reports the library size and what was omitted
+                        budget.omit(1)
+                        continue
+
+                    if len(message["games"]) == chunk_size:
+                        yield self.create_json_message(message)
+                        message = new_message(message["chunk"] + 1)
+                        budget.charge(message, reserve=False)
+                        if budget.exhausted:
+                            budget.omit(1)
+                            continue
+
+                    game_info = budget.take(OwnedGameRecord(game, include_appinfo).to_dict(steamid))
+                    if game_info is not None:
+                        message["games"].append(game_info)
+            finally:
+                response.close()
+        except Exception as e:
+            raise Exception(f"Failed to get owned games: {str(e)}")
+
+        if not game_count:
+            yield self.create_text_message("Unable to retrieve game list. The user's profile might be private or the user doesn't own any games.")
+            return
+
+        message["game_count"] = game_count
+        message["chunk_count"] = message["chunk"]
+        truncated = budget.report()
+        if truncated:
+            message["truncated"] = truncated
+        yield self.create_json_message(message)
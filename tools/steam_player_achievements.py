@@ -1,12 +1,19 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 import datetime
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.schema import get_game_schema
+from utils.steam_api import get_json_with_age, run_concurrently
+
 class SteamPlayerAchievementsTool(Tool):
+    @profiled("steam_player_achievements")
+    @metered("steam_player_achievements")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves the list of achievements for a specific Steam user in a particular game.
@@ -16,6 +23,8 @@ class SteamPlayerAchievementsTool(Tool):
                 - steamid (str): The 64-bit Steam ID of the player to query achievements for.
                 - appid (str): The AppID of the game to query achievements for.
                 - language (str, optional): The language for achievement names and descriptions.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the user's game achievements.
@@ -39,29 +48,26 @@ class SteamPlayerAchievementsTool(Tool):
             raise Exception("Game AppID cannot be empty.")
         
         # Get optional parameters
-        language = tool_parameters.get("language", "")  # Default is empty, using Steam's default language
+        language = tool_parameters.get("language", "")  # Default is empty, using English
+        budget = OutputBudget.from_parameters(tool_parameters)
 
         # 3. Call API to perform operation
         try:
-            # Build API URL, including optional language parameter
-            url = f"http://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v0001/?appid={appid}&key={api_key}&steamid={steamid}"
-            if language:
-                url += f"&l={language}"
-                
-            response = requests.get(url)
+            # Fetch the unlocalized player data and the cached game schema concurrently;
+            # names and descriptions are joined locally from the schema
+            params = {"appid": appid, "key": api_key, "steamid": steamid}
+            responses = run_concurrently({
+                "player": lambda: get_json_with_age("ISteamUserStats/GetPlayerAchievements/v0001/", params),
+                "schema": lambda: get_game_schema(api_key, appid, language),
+            })
+            if isinstance(responses["player"], Exception):
+                raise responses["player"]
+            data, stale_age = responses["player"]
             
-            # Check response status code
-            if response.status_code == 401:
-                raise Exception("API key is invalid or unauthorized.")
-            elif response.status_code == 403:
-                raise Exception("Access denied. The API key may not have sufficient permissions.")
-            elif response.status_code == 404:
-                raise Exception("No data found. The user might not exist, doesn't own the game, or has a private profile.")
-            elif response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            # Without a schema the achievements are returned with API names only
+            schema = responses["schema"]
+            if isinstance(schema, Exception):
+                schema = None
             
             # Check for API errors
             if 'playerstats' not in data:
@@ -79,7 +85,7 @@ class SteamPlayerAchievementsTool(Tool):
                 raise Exception("No achievement data found. The user might not own the game or the game might not support achievements")
             
             # Get basic information
-            game_name = playerstats.get('gameName', f"AppID: {appid}")
+            game_name = playerstats.get('gameName') or (schema and schema.game_name) or f"AppID: {appid}"
             steam_id = playerstats.get('steamID', steamid)
             achievements = playerstats.get('achievements', [])
             
@@ -104,8 +110,22 @@ class SteamPlayerAchievementsTool(Tool):
             if len(achievements) > 0:
                 result["completion_percentage"] = round((result["completed_count"] / result["achievement_count"]) * 100, 2)
             
+            # Sort by unlock time (unlocked achievements first, sorted by unlock time in descending order)
+            # before building, so a budget keeps the most recent unlocks
+            achievements = sorted(
+                achievements,
+                key=lambda x: (x.get('achieved', 0) != 1, -(x.get('unlocktime', 0) if x.get('achieved', 0) == 1 else 0))
+            )
+            
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process each achievement
-            for achievement in achievements:
+            for index, achievement in enumerate(achievements):
+                if budget.exhausted:
+                    budget.omit(len(achievements) - index)
+                    break
+
                 # Convert Unix timestamp to readable format
                 unlock_timestamp = achievement.get('unlocktime', 0)
                 unlock_date = datetime.datetime.fromtimestamp(unlock_timestamp).strftime('%Y-%m-%d %H:%M:%S') if unlock_timestamp and achievement.get('achieved', 0) == 1 else None
@@ -117,20 +137,21 @@ class SteamPlayerAchievementsTool(Tool):
                     "unlocktime_date": unlock_date
                 }
                 
-                # Add optional localized name and description
-                if 'name' in achievement:
-                    achievement_info["name"] = achievement.get('name')
-                    
-                if 'description' in achievement:
-                    achievement_info["description"] = achievement.get('description')
+                # Add localized name, description and icon from the game schema
+                if schema is not None:
+                    achievement_info.update(schema.describe_achievement(achievement.get('apiname'), achievement_info["achieved"]))
                 
-                result["achievements"].append(achievement_info)
-            
-            # Sort by unlock time (unlocked achievements first, sorted by unlock time in descending order)
-            result["achievements"] = sorted(
-                result["achievements"],
-                key=lambda x: (not x.get('achieved'), -(x.get('unlocktime_timestamp') or 0))
-            )
+                achievement_info = budget.take(achievement_info, text_field="description")
+                if achievement_info is not None:
+                    result["achievements"].append(achievement_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get player achievements: {str(e)}")
@@ -1,11 +1,17 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_with_age
+
 class SteamPlayerDetailsTool(Tool):
+    @profiled("steam_player_details")
+    @metered("steam_player_details")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves detailed profile information for multiple Steam users.
@@ -13,6 +19,8 @@ class SteamPlayerDetailsTool(Tool):
         Args:
             tool_parameters: A dictionary containing tool input parameters:
                 - steamids (str): Comma-separated list of Steam IDs, up to 100.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing detailed Steam user profiles.
@@ -36,17 +44,14 @@ class SteamPlayerDetailsTool(Tool):
         if len(id_list) > 100:
             raise Exception("You can query a maximum of 100 Steam IDs at once.")
 
+        budget = OutputBudget.from_parameters(tool_parameters)
+
         # 3. Call API to perform operation
         try:
-            url = f"http://api.steampowered.com/ISteamUser/GetPlayerSummaries/v0002/?key={api_key}&steamids={steamids}"
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age = get_json_with_age(
+                "ISteamUser/GetPlayerSummaries/v0002/",
+                {"key": api_key, "steamids": steamids}
+            )
             
             # Check if player data exists
             if 'response' not in data or 'players' not in data['response']:
@@ -75,8 +80,15 @@ class SteamPlayerDetailsTool(Tool):
                 6: "Looking to Play"
             }
             
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process detailed information for each player
-            for player in players:
+            for index, player in enumerate(players):
+                if budget.exhausted:
+                    budget.omit(len(players) - index)
+                    break
+
                 # Get status description
                 state_num = player.get('personastate', 0)
                 state_desc = persona_states.get(state_num, "Unknown")
@@ -112,7 +124,17 @@ class SteamPlayerDetailsTool(Tool):
                 # Filter out None values
                 player_info = {k: v for k, v in player_info.items() if v is not None}
                 
-                result["players"].append(player_info)
+                player_info = budget.take(player_info)
+                if player_info is not None:
+                    result["players"].append(player_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get player profiles: {str(e)}")
@@ -0,0 +1,231 @@
+from collections.abc import Generator
+from typing import Any
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.budget import OutputBudget
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json, run_concurrently
+
+ALL_SECTIONS = ["summary", "games", "recent", "friends"]
+
+# The lists offered to the output budget, by section, in priority order
+BUDGETED_LISTS = [("games", "top"), ("recent", "games")]
+
+
+def format_playtime(minutes: int) -> str:
+    """Formats a playtime in minutes the same way the single-purpose tools do."""
+    hours = minutes / 60
+    if hours < 1:
+        return f"{minutes} minutes"
+    return f"{hours:.1f} hours"
+
+
+def parse_limit(value: Any, default: int, name: str) -> int:
+    """Parses an optional positive integer parameter."""
+    if value in (None, ""):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise Exception(f"Invalid {name} value. It must be a positive integer.")
+    if limit <= 0:
+        raise Exception(f"Invalid {name} value. It must be a positive integer.")
+    return limit
+
+
+class SteamPlayerDossierTool(Tool):
+    @profiled("steam_player_dossier")
+    @metered("steam_player_dossier")
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Retrieves a compact profile of a Steam user in a single invocation.
+
+        The profile summary, owned games, recently played games and friend list
+        are requested from Steam concurrently and trimmed into one result.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - steamid (str): The 64-bit Steam ID of the user.
+                - sections (str, optional): Comma-separated sections to include (summary, games, recent, friends). Default is all.
+                - top_games (str, optional): Number of most played games to return. Default is 5.
+                - recent_games (str, optional): Number of recently played games to return. Default is 5.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the result.
+                - max_items (str, optional): Upper bound on the number of returned games across the game lists.
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing the combined player profile.
+
+        Raises:
+            Exception: If the parameters are invalid or every section fails.
+        """
+        # 1. Get credentials from runtime
+        try:
+            api_key = self.runtime.credentials["api_key"]
+        except KeyError:
+            raise Exception("Steam API Key is not configured or invalid. Please provide it in the plugin settings.")
+
+        # 2. Get tool input parameters
+        steamid = tool_parameters.get("steamid")
+        if not steamid:
+            raise Exception("Steam ID cannot be empty.")
+
+        sections_param = tool_parameters.get("sections") or ",".join(ALL_SECTIONS)
+        sections = [s.strip().lower() for s in sections_param.split(",") if s.strip()]
+        unknown = [s for s in sections if s not in ALL_SECTIONS]
+        if unknown or not sections:
+            raise Exception(f"Invalid sections: {', '.join(unknown)}. Valid values are: {', '.join(ALL_SECTIONS)}.")
+
+        top_games = parse_limit(tool_parameters.get("top_games"), 5, "top_games")
+        recent_games = parse_limit(tool_parameters.get("recent_games"), 5, "recent_games")
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        # 3. Call all APIs concurrently
+        tasks = {
+            "summary": lambda: get_json(
+                "ISteamUser/GetPlayerSummaries/v0002/",
+                {"key": api_key, "steamids": steamid},
+            ),
+            "games": lambda: get_json(
+                "IPlayerService/GetOwnedGames/v0001/",
+                {"key": api_key, "steamid": steamid, "include_appinfo": 1, "include_played_free_games": 1, "format": "json"},
+            ),
+            "recent": lambda: get_json(
+                "IPlayerService/GetRecentlyPlayedGames/v0001/",
+                {"key": api_key, "steamid": steamid, "format": "json"},
+            ),
+            "friends": lambda: get_json(
+                "ISteamUser/GetFriendList/v0001/",
+                {"key": api_key, "steamid": steamid, "relationship": "friend"},
+            ),
+        }
+        responses = run_concurrently({name: tasks[name] for name in sections})
+
+        # 4. Shape each section
+        shapers = {
+            "summary": lambda data: self._shape_summary(data, steamid),
+            "games": lambda data: self._shape_games(data, top_games),
+            "recent": lambda data: self._shape_recent(data, recent_games),
+            "friends": self._shape_friends,
+        }
+
+        result = {"success": True, "steamid": steamid}
+        errors = {}
+        for name in sections:
+            data = responses[name]
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                result[name] = shapers[name](data)
+            except Exception as e:
+                errors[name] = str(e)
+
+        if len(errors) == len(sections):
+            raise Exception(f"Failed to get player dossier: {'; '.join(f'{k}: {v}' for k, v in errors.items())}")
+
+        if errors:
+            result["errors"] = errors
+
+        # 5. Apply the output budget: the envelope first, then the game lists most played first
+        lists = []
+        for section, key in BUDGETED_LISTS:
+            if section in result:
+                lists.append((result[section], key, result[section][key]))
+                result[section][key] = []
+        budget.charge(result)
+
+        for container, key, items in lists:
+            for index, item in enumerate(items):
+                if budget.exhausted:
+                    budget.omit(len(items) - index)
+                    break
+                item = budget.take(item)
+                if item is not None:
+                    container[key].append(item)
+
+        truncated = budget.report()
+        if truncated:
+            result["truncated"] = truncated
+
+        # 6. Return result
+        yield self.create_json_message(result)
+
+    @staticmethod
+    def _shape_summary(data: dict, steamid: str) -> dict:
+        if "response" not in data or "players" not in data["response"]:
+            raise Exception("Invalid API response format")
+
+        players = data["response"]["players"]
+        if not players:
+            raise Exception(f"No Steam user found with ID: {steamid}")
+
+        player = players[0]
+        summary = {
+            "personaname": player.get("personaname"),
+            "profileurl": player.get("profileurl"),
+            "avatar": player.get("avatarmedium"),
+            "personastate": player.get("personastate"),
+            "communityvisibilitystate": player.get("communityvisibilitystate"),
+            "timecreated": player.get("timecreated"),
+            "gameextrainfo": player.get("gameextrainfo"),
+        }
+        return {k: v for k, v in summary.items() if v is not None}
+
+    @staticmethod
+    def _shape_games(data: dict, limit: int) -> dict:
+        response = data.get("response")
+        if response is None:
+            raise Exception("Invalid API response format.")
+        if "games" not in response:
+            if response.get("game_count") == 0:
+                return {"game_count": 0, "total_playtime_hours": 0, "top": []}
+            raise Exception("Unable to retrieve game list. The user's profile might be private.")
+
+        games = response["games"]
+        total_minutes = sum(game.get("playtime_forever", 0) for game in games)
+        top = sorted(games, key=lambda game: game.get("playtime_forever", 0), reverse=True)[:limit]
+
+        return {
+            "game_count": response.get("game_count", len(games)),
+            "total_playtime_hours": round(total_minutes / 60, 1),
+            "top": [
+                {
+                    "appid": game.get("appid"),
+                    "name": game.get("name"),
+                    "playtime_readable": format_playtime(game.get("playtime_forever", 0)),
+                }
+                for game in top
+            ],
+        }
+
+    @staticmethod
+    def _shape_recent(data: dict, limit: int) -> dict:
+        response = data.get("response")
+        if response is None:
+            raise Exception("Invalid API response format.")
+
+        games = response.get("games") or []
+        recent = sorted(games, key=lambda game: game.get("playtime_2weeks", 0), reverse=True)[:limit]
+        total_minutes = sum(game.get("playtime_2weeks", 0) for game in games)
+
+        return {
+            "total_count": response.get("total_count", len(games)),
+            "playtime_2weeks_hours": round(total_minutes / 60, 1),
+            "games": [
+                {
+                    "appid": game.get("appid"),
+                    "name": game.get("name"),
+                    "playtime_2weeks_readable": format_playtime(game.get("playtime_2weeks", 0)),
+                }
+                for game in recent
+            ],
+        }
+
+    @staticmethod
+    def _shape_friends(data: dict) -> dict:
+        if "friendslist" not in data or "friends" not in data["friendslist"]:
+            raise Exception("Invalid API response format or the user has no friends")
+
+        return {"friend_count": len(data["friendslist"]["friends"])}
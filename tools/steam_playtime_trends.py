@@ -0,0 +1,115 @@
+from collections.abc import Generator
+from typing import Any
+import datetime
+import time
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.budget import OutputBudget
+from utils.playtime_store import BUCKET_SECONDS, query_trends
+
+class SteamPlaytimeTrendsTool(Tool):
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Summarizes a Steam user's playtime trend from the locally recorded playtime history.
+
+        Samples are recorded by the recently played games tool with record=true.
+        This tool reads only the local history and makes no Steam API calls.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - steamid (str): The 64-bit Steam ID of the user.
+                - days (str, optional): Length of the period to summarize, in days. Default is 90.
+                - interval (str, optional): Aggregation interval. Possible values: day, week, month. Default is week.
+                - appid (str, optional): Restrict the trend to a single game.
+                - top_games (str, optional): Number of most played games in the period to list. Default is 10.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned trend.
+                - max_items (str, optional): Upper bound on the number of returned trend buckets.
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing the aggregated playtime trend.
+
+        Raises:
+            Exception: If the parameters are invalid or the history cannot be read.
+        """
+        # 1. Get tool input parameters
+        steamid = tool_parameters.get("steamid")
+        if not steamid:
+            raise Exception("Steam ID cannot be empty.")
+
+        interval = tool_parameters.get("interval", "") or "week"
+        if interval not in BUCKET_SECONDS:
+            raise Exception(f"The interval parameter must be one of: {', '.join(BUCKET_SECONDS)}.")
+
+        try:
+            days = int(tool_parameters.get("days", "") or 90)
+            top_games = int(tool_parameters.get("top_games", "") or 10)
+            appid = tool_parameters.get("appid", "")
+            appid = int(appid) if appid else None
+            if days <= 0 or top_games <= 0:
+                raise ValueError
+        except ValueError:
+            raise Exception("days and top_games must be positive integers and appid must be numeric.")
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        # 2. Aggregate the local history
+        try:
+            since = int(time.time()) - days * 86400
+            trends = query_trends(steamid, since, interval, appid)
+        except Exception as e:
+            raise Exception(f"Failed to read playtime history: {str(e)}")
+
+        if not trends["sample_count"]:
+            yield self.create_text_message(
+                f"No playtime history recorded for Steam ID {steamid} in the last {days} days. "
+                "Call the recently played games tool with record=true periodically to build the history."
+            )
+            return
+
+        # 3. Format result
+        total_minutes = sum(trends["buckets"].values())
+        most_played = sorted(trends["games"].items(), key=lambda item: item[1], reverse=True)[:top_games]
+
+        result = {
+            "success": True,
+            "steamid": steamid,
+            "days": days,
+            "interval": interval,
+            "sample_count": trends["sample_count"],
+            "total_minutes": total_minutes,
+            "total_hours": round(total_minutes / 60, 1),
+            "trend": [],
+            "top_games": [
+                {"appid": game_appid, "minutes": minutes, "hours": round(minutes / 60, 1)}
+                for game_appid, minutes in most_played
+                if minutes > 0
+            ]
+        }
+        if appid is not None:
+            result["appid"] = appid
+        # The envelope, top games included, counts against max_output_bytes too
+        budget.charge(result)
+
+        # Offer buckets newest first, so a budget keeps the most recent part of the trend
+        buckets = sorted(trends["buckets"].items(), reverse=True)
+        trend = result["trend"]
+        for index, (start, minutes) in enumerate(buckets):
+            if budget.exhausted:
+                budget.omit(len(buckets) - index)
+                break
+            bucket = budget.take({
+                "start": datetime.datetime.fromtimestamp(start).strftime('%Y-%m-%d'),
+                "minutes": minutes,
+                "hours": round(minutes / 60, 1)
+            })
+            if bucket is not None:
+                trend.append(bucket)
+        trend.reverse()
+
+        truncated = budget.report()
+        if truncated:
+            result["truncated"] = truncated
+
+        # 4. Return result
+        yield self.create_json_message(result)
@@ -0,0 +1,150 @@
+from collections.abc import Generator
+from typing import Any
+import datetime
+import hashlib
+import time
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.budget import OutputBudget
+from utils.presence import fetch_presence, get_watch
+from utils.profiling import profiled
+from utils.quota import metered, tenant_id
+from utils.steam_api import get_json_with_age
+
+# Upper bound on one invocation's watch duration, in seconds
+MAX_DURATION = 600
+
+# Upper bound on players in one watch
+MAX_PLAYERS = 1000
+
+
+class SteamPresenceWatchTool(Tool):
+    @profiled("steam_presence_watch")
+    @metered("steam_presence_watch")
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Watches the online status and current game of a set of Steam users and reports only changes.
+
+        The last-known presence of every watched player is kept in memory between
+        invocations, so each call reports what changed since the previous one.
+        With a duration, the tool keeps polling and emits a message for every
+        tick with changes; the poll interval shrinks while changes are frequent
+        and grows while the players are quiet.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters:
+                - steamid (str, optional): Watch the friends of this 64-bit Steam ID.
+                - steamids (str, optional): Comma-separated Steam IDs to watch.
+                - duration (str, optional): Seconds to keep polling. Default is 0, a single poll.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the changes in each message.
+                - max_items (str, optional): Upper bound on the number of changes in each message.
+
+        Yields:
+            ToolInvokeMessage: JSON messages containing presence changes.
+
+        Raises:
+            Exception: If the request fails, an exception with error information is thrown.
+        """
+        # 1. Get credentials from runtime
+        try:
+            api_key = self.runtime.credentials["api_key"]
+        except KeyError:
+            raise Exception("Steam API Key is not configured or invalid. Please provide it in the plugin settings.")
+
+        # 2. Get tool input parameters
+        steamid = tool_parameters.get("steamid")
+        steamids_param = tool_parameters.get("steamids")
+        if not steamid and not steamids_param:
+            raise Exception("Either steamid (to watch a user's friends) or steamids must be provided.")
+
+        try:
+            duration = int(tool_parameters.get("duration", "") or 0)
+            if duration < 0:
+                raise ValueError
+        except ValueError:
+            raise Exception("Invalid duration value. It must be a non-negative integer.")
+        duration = min(duration, MAX_DURATION)
+
+        # 3. Resolve the watched players
+        try:
+            steamids = []
+            for player_id in (steamids_param or "").split(","):
+                player_id = player_id.strip()
+                if player_id and player_id not in steamids:
+                    steamids.append(player_id)
+
+            if steamid:
+                data, _ = get_json_with_age(
+                    "ISteamUser/GetFriendList/v0001/",
+                    {"key": api_key, "steamid": steamid, "relationship": "friend"}
+                )
+                for friend in data.get("friendslist", {}).get("friends", []):
+                    if friend.get("steamid") and friend["steamid"] not in steamids:
+                        steamids.append(friend["steamid"])
+        except Exception as e:
+            raise Exception(f"Failed to get friend list: {str(e)}")
+
+        if not steamids:
+            yield self.create_text_message("There are no players to watch.")
+            return
+        if len(steamids) > MAX_PLAYERS:
+            raise Exception(f"You can watch a maximum of {MAX_PLAYERS} Steam IDs at once.")
+
+        # Watches are kept per workspace and per watched set
+        scope = f"friends:{steamid}" if steamid and not steamids_param else "ids:" + hashlib.sha1(",".join(sorted(steamids)).encode()).hexdigest()
+        watch = get_watch(f"{tenant_id(api_key)}|{scope}")
+
+        # Validates the limits up front; each message gets a budget of its own
+        OutputBudget.from_parameters(tool_parameters)
+
+        # 4. Poll and emit changes
+        deadline = time.monotonic() + duration
+        tick = 0
+        while True:
+            try:
+                with watch.lock:
+                    current, failed_batches = fetch_presence(api_key, steamids)
+                    if failed_batches and not current:
+                        raise Exception("Every GetPlayerSummaries request failed.")
+                    events, new_players = watch.update(current)
+            except Exception as e:
+                raise Exception(f"Failed to poll player presence: {str(e)}")
+
+            # The first tick always reports, later ticks only when something changed
+            if tick == 0 or events:
+                result = {
+                    "success": True,
+                    "polled_at": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    "watched_count": len(steamids),
+                    "change_count": len(events),
+                    "changes": [],
+                    "next_poll_seconds": round(watch.interval)
+                }
+                if new_players:
+                    result["new_players"] = new_players
+                if failed_batches:
+                    result["failed_batches"] = failed_batches
+
+                # The envelope counts against max_output_bytes too
+                budget = OutputBudget.from_parameters(tool_parameters)
+                budget.charge(result)
+                for index, event in enumerate(events):
+                    if budget.exhausted:
+                        budget.omit(len(events) - index)
+                        break
+                    event = budget.take(event)
+                    if event is not None:
+                        result["changes"].append(event)
+
+                truncated = budget.report()
+                if truncated:
+                    result["truncated"] = truncated
+                yield self.create_json_message(result)
+
+            tick += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(watch.interval, remaining))
@@ -1,11 +1,19 @@
 from collections.abc import Generator
 from typing import Any
-import requests
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.playtime_store import record_samples
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.steam_api import get_json_observed
+from utils.store import genre_rollup, get_metadata
+
 class SteamRecentlyPlayedTool(Tool):
+    @profiled("steam_recently_played")
+    @metered("steam_recently_played")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves a list of games a Steam user has played in the last two weeks.
@@ -14,6 +22,10 @@ class SteamRecentlyPlayedTool(Tool):
             tool_parameters: A dictionary containing tool input parameters:
                 - steamid (str): The 64-bit Steam ID of the user.
                 - count (str, optional): Limit the number of games returned.
+                - record (str, optional): Record the observed playtimes in the local playtime history.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned list.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
+                - enrich (str, optional): Add store metadata per game and recent playtime per genre.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the user's recently played games.
@@ -34,11 +46,14 @@ class SteamRecentlyPlayedTool(Tool):
         
         # Get optional count parameter
         count = tool_parameters.get("count", "")  # Default is empty, which means no limit
+        record = tool_parameters.get("record", "false").lower() == "true"
+        enrich = tool_parameters.get("enrich", "false").lower() == "true"
+        budget = OutputBudget.from_parameters(tool_parameters)
 
         # 3. Call API to perform operation
         try:
-            # Build API URL with parameters
-            url = f"http://api.steampowered.com/IPlayerService/GetRecentlyPlayedGames/v0001/?key={api_key}&steamid={steamid}&format=json"
+            # Build API parameters
+            params = {"key": api_key, "steamid": steamid, "format": "json"}
             
             # Add count parameter if provided
             if count:
@@ -46,24 +61,11 @@ class SteamRecentlyPlayedTool(Tool):
                     count_value = int(count)
                     if count_value <= 0:
                         raise ValueError("Count must be a positive number")
-                    url += f"&count={count_value}"
+                    params["count"] = count_value
                 except ValueError:
                     raise Exception("Invalid count value. It must be a positive integer.")
             
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code == 401:
-                raise Exception("API key is invalid or unauthorized.")
-            elif response.status_code == 403:
-                raise Exception("Access denied. The API key may not have sufficient permissions.")
-            elif response.status_code == 404:
-                raise Exception("No data found. The user might not exist or the profile is not public.")
-            elif response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
-            
-            # Parse response data
-            data = response.json()
+            data, stale_age, fetched = get_json_observed("IPlayerService/GetRecentlyPlayedGames/v0001/", params)
             
             # Check if the response format is valid
             if 'response' not in data:
@@ -85,8 +87,35 @@ class SteamRecentlyPlayedTool(Tool):
                 "games": []
             }
             
+            # Sort games by recent playtime (most played first) before building, so a budget keeps the most played
+            games = sorted(games,
+                           key=lambda x: x.get('playtime_2weeks', 0),
+                           reverse=True)
+
+            # Store metadata comes from the local cache; misses are fetched most played first
+            metadata = {}
+            if enrich:
+                try:
+                    metadata, pending = get_metadata([game.get('appid') for game in games])
+                    result["genre_playtime"] = genre_rollup(games, metadata, field="playtime_2weeks")
+                    result["metadata_coverage"] = {"enriched": len(metadata), "pending": pending}
+                except Exception as e:
+                    result["metadata_error"] = str(e)
+            
+            # Cached data is not a new observation, so nothing is recorded; say so rather than stay silent
+            if record and not fetched:
+                result["samples_recorded"] = 0
+                result["record_skipped"] = "served from cache; try again once the cached response expires"
+
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
             # Process each game
-            for game in games:
+            for index, game in enumerate(games):
+                if budget.exhausted:
+                    budget.omit(len(games) - index)
+                    break
+
                 game_info = {
                     "appid": game.get('appid'),
                     "name": game.get('name'),
@@ -123,14 +152,30 @@ class SteamRecentlyPlayedTool(Tool):
                     game_info["playtime_forever_readable"] = f"{minutes_forever} minutes"
                 else:
                     game_info["playtime_forever_readable"] = f"{hours_forever:.1f} hours"
+
+                if game.get('appid') in metadata:
+                    game_info["store"] = metadata[game.get('appid')]
                 
                 # Add to games list
-                result["games"].append(game_info)
+                game_info = budget.take(game_info)
+                if game_info is not None:
+                    result["games"].append(game_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
-            # Sort games by recent playtime (most played first)
-            result["games"] = sorted(result["games"], 
-                                    key=lambda x: x.get('playtime_2weeks', 0),
-                                    reverse=True)
+            # Append a playtime sample per game
+            if record and fetched:
+                try:
+                    result["samples_recorded"] = record_samples(steamid, games)
+                except Exception as e:
+                    result["samples_recorded"] = 0
+                    result["record_error"] = str(e)
             
         except Exception as e:
             raise Exception(f"Failed to get recently played games: {str(e)}")
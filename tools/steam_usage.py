@@ -0,0 +1,41 @@
+from collections.abc import Generator
+from typing import Any
+
+from dify_plugin import Tool
+from dify_plugin.entities.tool import ToolInvokeMessage
+
+from utils.key_pool import get_pool
+from utils.quota import quota_manager
+
+class SteamUsageTool(Tool):
+    def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Reports the calling workspace's Steam API usage and admission state.
+
+        Usage is tracked per workspace and per tool in the current quota window.
+        Only the caller's own workspace is reported. This tool makes no Steam API calls.
+
+        Args:
+            tool_parameters: A dictionary containing tool input parameters (none are used).
+
+        Yields:
+            ToolInvokeMessage: A JSON message containing usage, budgets and key health.
+
+        Raises:
+            Exception: If the API key is not configured.
+        """
+        # 1. Get credentials from runtime
+        try:
+            api_key = self.runtime.credentials["api_key"]
+        except KeyError:
+            raise Exception("Steam API Key is not configured or invalid. Please provide it in the plugin settings.")
+
+        # 2. Collect usage and key health
+        result = {
+            "success": True,
+            **quota_manager.usage(api_key),
+            "keys": get_pool(api_key).health()
+        }
+
+        # 3. Return result
+        yield self.create_json_message(result)
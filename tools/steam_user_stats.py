@@ -1,11 +1,24 @@
 from collections.abc import Generator
 from typing import Any
-import requests
+import math
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+from utils.budget import OutputBudget
+from utils.cohort import build_stat_matrix, rank_column
+from utils.profiling import profiled
+from utils.quota import metered
+from utils.schema import get_game_schema
+from utils.steam_api import get_json, get_json_with_age, run_concurrently
+
+# Maximum number of players compared in cohort mode
+MAX_COHORT_SIZE = 100
+
+
 class SteamUserStatsTool(Tool):
+    @profiled("steam_user_stats")
+    @metered("steam_user_stats")
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage, None, None]:
         """
         Retrieves detailed game statistics for a Steam user in a specific game.
@@ -15,6 +28,9 @@ class SteamUserStatsTool(Tool):
                 - steamid (str): The 64-bit Steam ID of the player to query statistics for.
                 - appid (str): The AppID of the game to query statistics for.
                 - language (str, optional): The language for returned data.
+                - cohort_steamids (str, optional): Comma-separated Steam IDs to rank the player against.
+                - max_output_bytes (str, optional): Upper bound on the serialized size of the returned lists.
+                - max_items (str, optional): Upper bound on the number of returned list entries.
 
         Yields:
             ToolInvokeMessage: A JSON message containing the user's game statistics.
@@ -38,29 +54,32 @@ class SteamUserStatsTool(Tool):
             raise Exception("Game AppID cannot be empty.")
         
         # Get optional parameters
-        language = tool_parameters.get("language", "")  # Default is empty, using Steam's default language
+        language = tool_parameters.get("language", "")  # Default is empty, using English
+
+        budget = OutputBudget.from_parameters(tool_parameters)
+
+        cohort_steamids = tool_parameters.get("cohort_steamids", "")
+        if cohort_steamids:
+            yield from self._invoke_cohort(api_key, steamid, appid, cohort_steamids, budget)
+            return
 
         # 3. Call API to perform operation
         try:
-            # Build API URL, including optional language parameter
-            url = f"http://api.steampowered.com/ISteamUserStats/GetUserStatsForGame/v0002/?appid={appid}&key={api_key}&steamid={steamid}"
-            if language:
-                url += f"&l={language}"
-                
-            response = requests.get(url)
-            
-            # Check response status code
-            if response.status_code == 401:
-                raise Exception("API key is invalid or unauthorized.")
-            elif response.status_code == 403:
-                raise Exception("Access denied. The API key may not have sufficient permissions.")
-            elif response.status_code == 404:
-                raise Exception("No data found. The user might not exist, doesn't own the game, or has a private profile.")
-            elif response.status_code != 200:
-                raise Exception(f"Steam API request failed with status code: {response.status_code}")
+            # Fetch the unlocalized player data and the cached game schema concurrently;
+            # display names are joined locally from the schema
+            params = {"appid": appid, "key": api_key, "steamid": steamid}
+            responses = run_concurrently({
+                "player": lambda: get_json_with_age("ISteamUserStats/GetUserStatsForGame/v0002/", params),
+                "schema": lambda: get_game_schema(api_key, appid, language),
+            })
+            if isinstance(responses["player"], Exception):
+                raise responses["player"]
+            data, stale_age = responses["player"]
             
-            # Parse response data
-            data = response.json()
+            # Without a schema the stats are returned with API names only
+            schema = responses["schema"]
+            if isinstance(schema, Exception):
+                schema = None
             
             # Check API response format
             if 'playerstats' not in data:
@@ -74,7 +93,7 @@ class SteamUserStatsTool(Tool):
                 raise Exception(f"Steam API returned an error: {error_msg}")
             
             # Get game name and player information
-            game_name = playerstats.get('gameName', f"AppID: {appid}")
+            game_name = playerstats.get('gameName') or (schema and schema.game_name) or f"AppID: {appid}"
             steam_id = playerstats.get('steamID', steamid)
             
             # Get statistics data
@@ -95,19 +114,9 @@ class SteamUserStatsTool(Tool):
                 }
             }
             
-            # Add statistics data
             if stats:
                 result["stats_count"] = len(stats)
                 result["stats"] = []
-                
-                for stat in stats:
-                    stat_info = {
-                        "name": stat.get('name'),
-                        "value": stat.get('value')
-                    }
-                    result["stats"].append(stat_info)
-            
-            # Add achievement data
             if achievements:
                 result["achievement_count"] = len(achievements)
                 result["completed_count"] = sum(1 for a in achievements if a.get('achieved', 0) == 1)
@@ -117,16 +126,164 @@ class SteamUserStatsTool(Tool):
                     result["completion_percentage"] = round((result["completed_count"] / result["achievement_count"]) * 100, 2)
                 
                 result["achievements"] = []
-                
-                for achievement in achievements:
+
+            # The envelope counts against max_output_bytes too
+            budget.charge(result)
+
+            # Add statistics data
+            if stats:
+                for index, stat in enumerate(stats):
+                    if budget.exhausted:
+                        budget.omit(len(stats) - index)
+                        break
+
+                    stat_info = {
+                        "name": stat.get('name'),
+                        "value": stat.get('value')
+                    }
+                    if schema is not None and stat.get('name') in schema.stats:
+                        stat_info["display_name"] = schema.stats[stat.get('name')]
+                    stat_info = budget.take(stat_info)
+                    if stat_info is not None:
+                        result["stats"].append(stat_info)
+            
+            # Add achievement data
+            if achievements:
+                for index, achievement in enumerate(achievements):
+                    if budget.exhausted:
+                        budget.omit(len(achievements) - index)
+                        break
+
                     achievement_info = {
                         "name": achievement.get('name'),
                         "achieved": achievement.get('achieved') == 1
                     }
-                    result["achievements"].append(achievement_info)
+                    if schema is not None:
+                        display = schema.describe_achievement(achievement.get('name'), achievement_info["achieved"])
+                        if display.get("name"):
+                            achievement_info["display_name"] = display["name"]
+                        if display.get("hidden"):
+                            achievement_info["hidden"] = True
+                    achievement_info = budget.take(achievement_info)
+                    if achievement_info is not None:
+                        result["achievements"].append(achievement_info)
+
+            truncated = budget.report()
+            if truncated:
+                result["truncated"] = truncated
+
+            # Flag responses served from cache while a refresh runs
+            if stale_age is not None:
+                result["cache_age_seconds"] = round(stale_age)
             
         except Exception as e:
             raise Exception(f"Failed to get user game statistics: {str(e)}")
 
         # 4. Return result
-        yield self.create_json_message(result)
\ No newline at end of file
+        yield self.create_json_message(result)
+
+    def _invoke_cohort(self, api_key: str, steamid: str, appid: str, cohort_steamids: str, budget: OutputBudget) -> Generator[ToolInvokeMessage, None, None]:
+        """
+        Ranks a player's stats against a cohort of other players in the same game.
+
+        Stats for every player are fetched concurrently, packed into a
+        stat x player matrix and ranked in one pass. Players whose stats are
+        private or missing are reported separately and left out of the ranking.
+        Steam omits stats whose value is zero, so a stat missing from a returned
+        player's stats counts as 0.
+        """
+        cohort = []
+        for cohort_id in [steamid] + cohort_steamids.split(","):
+            cohort_id = cohort_id.strip()
+            if cohort_id and cohort_id not in cohort:
+                cohort.append(cohort_id)
+
+        if len(cohort) > MAX_COHORT_SIZE:
+            raise Exception(f"You can compare a maximum of {MAX_COHORT_SIZE} Steam IDs at once.")
+
+        def fetch(player_id: str):
+            return lambda: get_json(
+                "ISteamUserStats/GetUserStatsForGame/v0002/",
+                {"appid": appid, "key": api_key, "steamid": player_id},
+            )
+
+        responses = run_concurrently({player_id: fetch(player_id) for player_id in cohort})
+
+        player_stats = {}
+        unavailable = []
+        game_name = f"AppID: {appid}"
+        for player_id in cohort:
+            data = responses[player_id]
+            if isinstance(data, Exception):
+                unavailable.append({"steamid": player_id, "reason": str(data)})
+                continue
+
+            playerstats = data.get("playerstats", {}) if isinstance(data, dict) else {}
+            if "error" in playerstats:
+                unavailable.append({"steamid": player_id, "reason": playerstats.get("error", "Unknown error")})
+                continue
+
+            stats = {}
+            for stat in playerstats.get("stats", []):
+                try:
+                    stats[stat["name"]] = float(stat["value"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+            if not stats:
+                unavailable.append({"steamid": player_id, "reason": "No statistics available (profile may be private)"})
+                continue
+
+            player_stats[player_id] = stats
+            game_name = playerstats.get("gameName", game_name)
+
+        if steamid not in player_stats:
+            reason = next((u["reason"] for u in unavailable if u["steamid"] == steamid), "No statistics available")
+            raise Exception(f"Failed to get user game statistics: {reason}")
+
+        # Only players with returned stats are in the matrix, so a missing stat is a zero, not an unknown
+        stat_names, steamids, matrix = build_stat_matrix(player_stats, missing_value=0.0)
+        ranking = rank_column(matrix, steamids.index(steamid))
+
+        def clean(value: float, digits: int = 2):
+            return None if math.isnan(value) else round(float(value), digits)
+
+        ranked = [i for i in range(len(stat_names)) if not math.isnan(ranking["value"][i])]
+        result = {
+            "success": True,
+            "steamid": steamid,
+            "game": {
+                "appid": appid,
+                "name": game_name
+            },
+            "cohort_size": len(player_stats),
+            "stats_count": len(ranked),
+            "stats": []
+        }
+        if unavailable:
+            result["unavailable"] = unavailable
+        # The envelope, unavailable players included, counts against max_output_bytes too
+        budget.charge(result)
+
+        for position, i in enumerate(ranked):
+            if budget.exhausted:
+                budget.omit(len(ranked) - position)
+                break
+            stat_info = budget.take({
+                "name": stat_names[i],
+                "value": clean(ranking["value"][i], 4),
+                "rank": int(ranking["rank"][i]),
+                "of": int(ranking["cohort_size"][i]),
+                "percentile": clean(ranking["percentile"][i]),
+                "zscore": clean(ranking["zscore"][i], 3),
+                "cohort_mean": clean(ranking["mean"][i]),
+                "cohort_median": clean(ranking["median"][i])
+            })
+            if stat_info is not None:
+                result["stats"].append(stat_info)
+
+        truncated = budget.report()
+        if truncated:
+            result["truncated"] = truncated
+
+        yield self.create_json_message(result)
@@ -0,0 +1,88 @@
+from collections.abc import Iterator
+
+
+def build_bitsets(player_achievements: dict[str, list[dict]]) -> tuple[list[str], dict[str, int]]:
+    """
+    Packs each player's unlocks into a bitset over the game's achievement index.
+
+    Args:
+        player_achievements: Mapping of Steam ID to the achievements list of a
+            GetPlayerAchievements response.
+
+    Returns:
+        A tuple of (achievement API names, Steam ID -> bitset), where bit i of a
+        bitset is set if the player has unlocked achievement i.
+    """
+    apinames = sorted({a["apiname"] for achievements in player_achievements.values() for a in achievements if "apiname" in a})
+    index = {apiname: i for i, apiname in enumerate(apinames)}
+
+    bitsets = {}
+    for steamid, achievements in player_achievements.items():
+        bitset = 0
+        for achievement in achievements:
+            if achievement.get("achieved") == 1 and achievement.get("apiname") in index:
+                bitset |= 1 << index[achievement["apiname"]]
+        bitsets[steamid] = bitset
+
+    return apinames, bitsets
+
+
+def iter_bits(bitset: int) -> Iterator[int]:
+    """Yields the indices of the set bits, lowest first."""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def compare_bitsets(bitsets: dict[str, int], size: int) -> dict:
+    """
+    Finds the achievements every player, no player and exactly one player has unlocked.
+
+    Returns:
+        A dict with "everyone", "nobody" and "only_one" bitsets and "owners",
+        mapping each only_one bit index to the Steam ID that has it.
+    """
+    full = (1 << size) - 1
+    everyone = full
+    once = 0
+    twice = 0
+    for bitset in bitsets.values():
+        everyone &= bitset
+        # Bits seen at least twice move from once to twice
+        twice |= once & bitset
+        once |= bitset
+
+    only_one = once & ~twice
+    owners = {}
+    for steamid, bitset in bitsets.items():
+        for bit in iter_bits(bitset & only_one):
+            owners[bit] = steamid
+
+    return {
+        "everyone": everyone if bitsets else 0,
+        "nobody": full & ~once,
+        "only_one": only_one,
+        "owners": owners,
+    }
+
+
+def pairwise_overlap(bitsets: dict[str, int]) -> list[tuple[str, str, int, float]]:
+    """
+    Computes the shared unlocks of every pair of players.
+
+    Returns:
+        (Steam ID, Steam ID, shared count, Jaccard similarity) tuples, most
+        shared first.
+    """
+    steamids = list(bitsets)
+    counts = {steamid: bitsets[steamid].bit_count() for steamid in steamids}
+    pairs = []
+    for i, first in enumerate(steamids):
+        for second in steamids[i + 1:]:
+            shared = (bitsets[first] & bitsets[second]).bit_count()
+            union = counts[first] + counts[second] - shared
+            pairs.append((first, second, shared, shared / union if union else 0.0))
+
+    pairs.sort(key=lambda pair: (-pair[2], -pair[3]))
+    return pairs
@@ -0,0 +1,176 @@
+from typing import Any
+import os
+import re
+
+from utils.codec import dumps
+
+# Deployment-wide defaults, used when a tool call does not set its own budget
+DEFAULT_MAX_OUTPUT_BYTES = os.environ.get("STEAM_MAX_OUTPUT_BYTES", "")
+DEFAULT_MAX_ITEMS = os.environ.get("STEAM_MAX_ITEMS", "")
+
+# Text shorter than this is dropped with its item rather than cut down further
+MIN_TEXT_BYTES = 80
+
+# Bytes held back with the envelope for the fields added after the items,
+# such as the truncation report, the cache age or a next cursor
+ENVELOPE_RESERVE_BYTES = 256
+
+ELLIPSIS = "…"
+
+_SENTENCE_END = re.compile(r"[.!?。！？](?=\s|$)|[。！？]|\n")
+
+
+def truncate_text(text: str, max_bytes: int) -> str:
+    """
+    Shortens text to at most max_bytes UTF-8 bytes, cutting at the last sentence boundary.
+
+    Falls back to the last word boundary when the kept part contains no
+    complete sentence. An ellipsis marks that the text was shortened.
+    """
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+
+    limit = max(max_bytes - len(ELLIPSIS.encode("utf-8")), 0)
+    head = encoded[:limit].decode("utf-8", "ignore")
+
+    cut = None
+    for match in _SENTENCE_END.finditer(head):
+        cut = match.end()
+    if not cut:
+        cut = head.rfind(" ")
+    if not cut or cut <= 0:
+        cut = len(head)
+
+    return head[:cut].rstrip() + ELLIPSIS
+
+
+def _parse_limit(value: Any, name: str) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise Exception(f"Invalid {name} value. It must be a positive integer.")
+    if limit <= 0:
+        raise Exception(f"Invalid {name} value. It must be a positive integer.")
+    return limit
+
+
+class OutputBudget:
+    """
+    Caps the size of a tool's result while the result is being built.
+
+    Tools charge the envelope of their result (everything but the items) up
+    front, then offer items in priority order; each accepted item is charged
+    its serialized size against max_output_bytes and counted against
+    max_items. Once an item does not fit, the budget is exhausted and every
+    remaining item is counted as omitted without being built.
+    """
+
+    def __init__(self, max_output_bytes: int | None = None, max_items: int | None = None):
+        self.max_output_bytes = max_output_bytes
+        self.max_items = max_items
+        self.used_bytes = 0
+        self.items = 0
+        self.omitted_items = 0
+        self.truncated_texts = 0
+        self.exhausted = False
+
+    @classmethod
+    def from_parameters(cls, tool_parameters: dict[str, Any]) -> "OutputBudget":
+        """Builds a budget from the max_output_bytes/max_items tool parameters."""
+        max_output_bytes = tool_parameters.get("max_output_bytes") or DEFAULT_MAX_OUTPUT_BYTES
+        max_items = tool_parameters.get("max_items") or DEFAULT_MAX_ITEMS
+        return cls(
+            max_output_bytes=_parse_limit(max_output_bytes, "max_output_bytes"),
+            max_items=_parse_limit(max_items, "max_items"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_output_bytes is not None or self.max_items is not None
+
+    def charge(self, envelope: Any, reserve: bool = True) -> None:
+        """
+        Charges the part of a result that is not offered item by item.
+
+        Call with the envelope built and its item lists still empty, before
+        any item is offered. Unless reserve is False (e.g. for the second and
+        later messages of a stream), a reserve for the fields added after the
+        items is charged with it. An envelope that does not fit exhausts the budget.
+        """
+        if self.max_output_bytes is None:
+            return
+        self.used_bytes += len(dumps(envelope)) + (ENVELOPE_RESERVE_BYTES if reserve else 0)
+        if self.used_bytes >= self.max_output_bytes:
+            self.exhausted = True
+
+    def take(self, item: dict, text_field: str | None = None) -> dict | None:
+        """
+        Charges an item against the budget.
+
+        Args:
+            item: The fully built result item.
+            text_field: Optional key of a long text value that may be cut at a
+                sentence boundary to make the item fit.
+
+        Returns:
+            The item (possibly with its text shortened), or None if it does
+            not fit. A rejected item exhausts the budget.
+        """
+        if self.exhausted:
+            self.omitted_items += 1
+            return None
+
+        if self.max_items is not None and self.items >= self.max_items:
+            return self._reject()
+
+        if self.max_output_bytes is None:
+            self.items += 1
+            return item
+
+        size = self._size(item)
+        remaining = self.max_output_bytes - self.used_bytes
+        if size > remaining and text_field and isinstance(item.get(text_field), str):
+            text = item[text_field]
+            text_bytes = len(text.encode("utf-8"))
+            allowed = text_bytes - (size - remaining)
+            if allowed >= MIN_TEXT_BYTES:
+                item = {**item, text_field: truncate_text(text, allowed)}
+                size = self._size(item)
+                self.truncated_texts += 1
+
+        if size > remaining:
+            return self._reject()
+
+        self.used_bytes += size
+        self.items += 1
+        return item
+
+    def omit(self, count: int) -> None:
+        """Records items that were skipped without being offered, e.g. once the budget is exhausted."""
+        self.omitted_items += count
+        self.exhausted = True
+
+    def report(self) -> dict | None:
+        """Describes what was left out, or None if the result is complete."""
+        if not self.omitted_items and not self.truncated_texts:
+            return None
+        return {
+            "max_output_bytes": self.max_output_bytes,
+            "max_items": self.max_items,
+            "returned_items": self.items,
+            "omitted_items": self.omitted_items,
+            "truncated_texts": self.truncated_texts,
+        }
+
+    def _reject(self) -> None:
+        self.exhausted = True
+        self.omitted_items += 1
+        return None
+
+    @staticmethod
+    def _size(item: dict) -> int:
+        # +1 for the separating comma in the enclosing list
+        return len(dumps(item)) + 1
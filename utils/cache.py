@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from typing import Any
+import os
+import threading
+import time
+
+# Seconds a cached response is served without revalidation, and seconds after
+# that during which it may still be served while a background refresh runs.
+DEFAULT_POLICIES = {
+    "GetPlayerSummaries": (60, 300),
+    "GetOwnedGames": (300, 3600),
+    "GetRecentlyPlayedGames": (300, 1800),
+    "GetFriendList": (600, 3600),
+    "GetNewsForApp": (600, 3600),
+    "GetGlobalAchievementPercentagesForApp": (3600, 86400),
+    "GetPlayerAchievements": (300, 1800),
+    "GetUserStatsForGame": (300, 1800),
+}
+
+MAX_ENTRIES = int(os.environ.get("STEAM_CACHE_MAX_ENTRIES", "1024"))
+
+# Upper bound on the summed size of cached responses, counted in bytes as sent by Steam.
+# Decoded bodies take roughly twice as much memory.
+MAX_BYTES = int(os.environ.get("STEAM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Number of locks shared out by key hash to coalesce concurrent cache misses
+LOCK_STRIPES = 64
+
+
+def _parse_overrides(value: str) -> dict[str, int]:
+    """Parses "Endpoint=seconds,Endpoint=seconds" environment overrides."""
+    overrides = {}
+    for pair in value.split(","):
+        name, _, seconds = pair.partition("=")
+        if name.strip() and seconds.strip():
+            overrides[name.strip()] = int(seconds)
+    return overrides
+
+
+class CachePolicy:
+    """Freshness rules for one Steam endpoint."""
+
+    __slots__ = ("ttl", "stale_window")
+
+    def __init__(self, ttl: int, stale_window: int):
+        self.ttl = ttl
+        self.stale_window = stale_window
+
+
+def load_policies() -> dict[str, CachePolicy]:
+    """
+    Builds the per-endpoint policies, applying STEAM_CACHE_TTL and STEAM_STALE_WINDOW overrides.
+
+    Both variables take comma-separated "Endpoint=seconds" pairs, e.g.
+    STEAM_STALE_WINDOW="GetOwnedGames=7200,GetNewsForApp=0". The endpoint
+    name "*" applies to every endpoint without its own override.
+    """
+    ttl_overrides = _parse_overrides(os.environ.get("STEAM_CACHE_TTL", ""))
+    stale_overrides = _parse_overrides(os.environ.get("STEAM_STALE_WINDOW", ""))
+
+    policies = {}
+    for name in (set(DEFAULT_POLICIES) | set(ttl_overrides) | set(stale_overrides)) - {"*"}:
+        ttl, stale_window = DEFAULT_POLICIES.get(name, (0, 0))
+        ttl = ttl_overrides.get(name, ttl_overrides.get("*", ttl))
+        stale_window = stale_overrides.get(name, stale_overrides.get("*", stale_window))
+        policies[name] = CachePolicy(ttl, stale_window)
+    return policies
+
+
+POLICIES = load_policies()
+
+NO_CACHE = CachePolicy(0, 0)
+
+
+def policy_for(path: str) -> CachePolicy:
+    """Returns the policy for an API path such as "IPlayerService/GetOwnedGames/v0001/"."""
+    parts = path.strip("/").split("/")
+    method = parts[1] if len(parts) > 1 else parts[0]
+    return POLICIES.get(method, NO_CACHE)
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "size")
+
+    def __init__(self, value: Any, stored_at: float, size: int = 0):
+        self.value = value
+        self.stored_at = stored_at
+        self.size = size
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded LRU cache of decoded Steam responses.
+
+    The cache holds at most max_entries values and, when max_bytes is set, at
+    most max_bytes of values as measured by the size passed to set. Values
+    larger than max_bytes on their own are not cached.
+
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, size: int = 0) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = CacheEntry(value, time.monotonic(), size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class StripedLocks:
+    """
+    A fixed set of locks shared out by key hash.
+
+    Lets concurrent misses for the same key share a single build without
+    keeping a lock for every key ever seen, so memory stays flat in a
+    long-running process. Unrelated keys on the same stripe wait for each
+    other, which only costs time on a miss.
+    """
+
+    def __init__(self, stripes: int = LOCK_STRIPES):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,154 @@
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import base64
+import datetime
+import gzip
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.codec import dumps, loads
+from utils.storage import data_path
+
+# "record" captures every upstream exchange, "replay" serves them back without network access
+CASSETTE_MODE = os.environ.get("STEAM_CASSETTE_MODE", "").strip().lower()
+
+CASSETTE_FILENAME = "steam.cassette.jsonl.gz"
+
+# Replayed latency is the recorded latency times this factor; 0 replays as fast as possible
+LATENCY_SCALE = float(os.environ.get("STEAM_REPLAY_LATENCY_SCALE", "1"))
+
+# Query parameters holding credentials; their values never reach the cassette
+SECRET_PARAMS = {"key", "access_token"}
+
+REDACTED = "REDACTED"
+
+# Response headers worth keeping; the rest only make cassettes larger. Content-Encoding
+# is dropped because the recorded body is the decoded one
+KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+
+def cassette_path() -> str:
+    return os.environ.get("STEAM_CASSETTE") or data_path(CASSETTE_FILENAME)
+
+
+def scrub_url(url: str) -> str:
+    """Redacts credentials from a URL and sorts its query, so equal requests map to equal URLs."""
+    parts = urlsplit(url)
+    query = sorted((name, REDACTED if name in SECRET_PARAMS else value) for name, value in parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that appends every exchange to a gzip-compressed JSON lines cassette.
+
+    Streamed bodies are read in full so they can be recorded; callers still
+    iterate them as usual. Every exchange is appended as soon as it completes,
+    so a killed process loses nothing it already received.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        body = response.content
+        elapsed = time.perf_counter() - started
+
+        entry = {
+            "method": request.method,
+            "url": scrub_url(request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "elapsed": round(elapsed, 4),
+            "recorded_at": int(time.time()),
+        }
+        try:
+            entry["body"] = body.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["body_b64"] = base64.b64encode(body).decode("ascii")
+
+        self._write(entry)
+        return response
+
+    def _write(self, entry: dict) -> None:
+        # Each exchange is its own gzip member; concatenated members read back as one stream
+        member = gzip.compress(dumps(entry) + b"\n")
+        with self._lock, open(self.path, "ab") as file:
+            file.write(member)
+
+
+def load_cassette(path: str) -> dict[tuple[str, str], deque]:
+    """Reads a cassette into per-request queues of recorded exchanges, in recording order."""
+    exchanges: dict[tuple[str, str], deque] = {}
+    with gzip.open(path, "rb") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = loads(line)
+            exchanges.setdefault((entry["method"], entry["url"]), deque()).append(entry)
+    return exchanges
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves requests from a cassette without network access.
+
+    Repeated requests get the recorded responses in order; once they run out
+    the last one is served again. Each response is delayed by its recorded
+    latency times LATENCY_SCALE.
+    """
+
+    def __init__(self, path: str, latency_scale: float = LATENCY_SCALE):
+        super().__init__()
+        self.exchanges = load_cassette(path)
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        key = (request.method, scrub_url(request.url))
+        with self._lock:
+            recorded = self.exchanges.get(key)
+            if not recorded:
+                raise requests.ConnectionError(f"No recorded response for {request.method} {key[1]}", request=request)
+            entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+
+        if self.latency_scale > 0:
+            time.sleep(entry.get("elapsed", 0) * self.latency_scale)
+
+        body = base64.b64decode(entry["body_b64"]) if "body_b64" in entry else entry.get("body", "").encode("utf-8")
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry.get("reason")
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = datetime.timedelta(seconds=entry.get("elapsed", 0))
+        response._content = body
+        # Marks the body as already read, so iter_content serves it from memory
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+
+def cassette_adapter(**kwargs) -> BaseAdapter | None:
+    """Returns the adapter for the configured cassette mode, or None when no cassette is in use."""
+    if CASSETTE_MODE == "record":
+        return RecordingAdapter(cassette_path(), **kwargs)
+    if CASSETTE_MODE == "replay":
+        return ReplayAdapter(cassette_path())
+    if CASSETTE_MODE:
+        raise ValueError(f"Unknown STEAM_CASSETTE_MODE {CASSETTE_MODE!r}. Use 'record' or 'replay'.")
+    return None
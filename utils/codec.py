@@ -0,0 +1,71 @@
+from typing import Any
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# "auto" uses orjson when it is installed, "stdlib" always uses the json module
+CODEC = os.environ.get("STEAM_JSON_CODEC", "auto").strip().lower()
+
+
+def _stdlib_loads(data: bytes | str) -> Any:
+    # json.loads still decodes bytes to a str internally, but it skips the
+    # charset detection response.json() runs over the body first
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_loads(data: bytes | str) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson rejects some input the json module accepts, such as a byte order mark
+        # or integers beyond 64 bits; the json module also produces the error for invalid input
+        return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return _stdlib_dumps(obj)
+
+
+def _select(codec: str):
+    if codec not in ("auto", "orjson", "stdlib"):
+        raise ValueError(f"Unknown STEAM_JSON_CODEC {codec!r}. Use 'auto', 'orjson' or 'stdlib'.")
+    if codec == "orjson" and orjson is None:
+        raise ValueError("STEAM_JSON_CODEC is 'orjson' but orjson is not installed.")
+    if codec != "stdlib" and orjson is not None:
+        return "orjson", _orjson_loads, _orjson_dumps
+    return "stdlib", _stdlib_loads, _stdlib_dumps
+
+
+CODEC_NAME, _loads, _dumps = _select(CODEC)
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Decodes JSON, preferably straight from a response body's bytes.
+
+    Raises:
+        ValueError: If data is not valid JSON.
+    """
+    return _loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes obj as compact UTF-8 JSON.
+
+    Both codecs produce compact JSON without ASCII escaping, matching the form
+    tool messages are sent in. The bytes are equal except for floats, which
+    each codec formats its own way (1e16 is "1e+16" from json, "1e16" from orjson).
+    """
+    return _dumps(obj)
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+def build_stat_matrix(player_stats: dict[str, dict[str, float]], missing_value: float = np.nan) -> tuple[list[str], list[str], np.ndarray]:
+    """
+    Packs per-player stats into a dense stat x player matrix.
+
+    Args:
+        player_stats: Mapping of Steam ID to a mapping of stat name to value.
+        missing_value: Value stored for stats a player did not report. NaN, the
+            default, leaves the player out of that stat's ranking.
+
+    Returns:
+        A tuple of (stat names, Steam IDs, matrix).
+    """
+    stat_names = sorted({name for stats in player_stats.values() for name in stats})
+    steamids = list(player_stats)
+    stat_index = {name: i for i, name in enumerate(stat_names)}
+
+    matrix = np.full((len(stat_names), len(steamids)), missing_value, dtype=np.float64)
+    for column, steamid in enumerate(steamids):
+        for name, value in player_stats[steamid].items():
+            matrix[stat_index[name], column] = value
+
+    return stat_names, steamids, matrix
+
+
+def rank_column(matrix: np.ndarray, column: int) -> dict[str, np.ndarray]:
+    """
+    Ranks one player against every other player for all stats at once.
+
+    Args:
+        matrix: A stat x player matrix as returned by build_stat_matrix.
+        column: Index of the player to rank.
+
+    Returns:
+        Per-stat arrays: value, percentile (0-100, ties count half), rank
+        (1 is the highest value), cohort size, mean, median and z-score.
+        Entries are NaN where the player has no value for the stat.
+    """
+    values = matrix[:, column]
+    present = ~np.isnan(matrix)
+    cohort_size = present.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # NaN compares False, so missing values never count as below/above/equal
+        below = (matrix < values[:, None]).sum(axis=1)
+        above = (matrix > values[:, None]).sum(axis=1)
+        equal = (matrix == values[:, None]).sum(axis=1)
+
+        percentile = (below + 0.5 * equal) / cohort_size * 100
+        rank = above + 1.0
+
+        has_values = cohort_size > 0
+        mean = np.full(len(values), np.nan)
+        median = np.full(len(values), np.nan)
+        std = np.full(len(values), np.nan)
+        mean[has_values] = np.nanmean(matrix[has_values], axis=1)
+        median[has_values] = np.nanmedian(matrix[has_values], axis=1)
+        std[has_values] = np.nanstd(matrix[has_values], axis=1)
+
+        zscore = np.where(std > 0, (values - mean) / std, 0.0)
+
+    missing = np.isnan(values)
+    percentile[missing] = np.nan
+    rank[missing] = np.nan
+    zscore[missing] = np.nan
+
+    return {
+        "value": values,
+        "percentile": percentile,
+        "rank": rank,
+        "cohort_size": cohort_size,
+        "mean": mean,
+        "median": median,
+        "zscore": zscore,
+    }
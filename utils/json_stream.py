@@ -0,0 +1,86 @@
+from collections.abc import Iterable, Iterator
+from typing import Any
+import codecs
+import json
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Incrementally decodes the elements of the first JSON array stored under `key`.
+
+    Only the current network chunk and the element being decoded are held in
+    memory, so arbitrarily long arrays (e.g. GetOwnedGames "games" or
+    GetFriendList "friends") can be consumed with flat memory usage. Elements
+    may be any JSON value and may be split across chunks at any byte.
+
+    Args:
+        chunks: Raw response body chunks, e.g. from Response.iter_content().
+        key: Object key whose array value should be streamed.
+
+    Yields:
+        Each decoded array element, in document order. Yields nothing if the
+        key does not occur in the body.
+
+    Raises:
+        ValueError: If the body ends in the middle of the array or an element is malformed.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    marker = f'"{key}"'
+
+    buffer = ""
+    in_array = False
+    finished = False
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+
+        if not in_array:
+            start = buffer.find(marker)
+            if start == -1:
+                # Keep a tail in case the marker is split across chunks
+                buffer = buffer[-len(marker):]
+                continue
+
+            pos = start + len(marker)
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE + ":":
+                pos += 1
+            if pos == len(buffer):
+                buffer = buffer[start:]
+                continue
+            if buffer[pos] != "[":
+                raise ValueError(f"Expected an array for key '{key}'")
+
+            buffer = buffer[pos + 1:]
+            in_array = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                finished = True
+                break
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element is incomplete; wait for the next chunk
+                break
+            if end == len(buffer) or buffer[end] not in _WHITESPACE + ",]":
+                # A number cut at the chunk boundary ("12" of "123", "-7500" of
+                # "-7500.0") decodes as a shorter one, so an element counts as
+                # complete only once the delimiter after it has arrived
+                break
+            pos = end
+            yield item
+
+        if finished:
+            return
+        buffer = buffer[pos:]
+
+    if in_array:
+        raise ValueError(f"Response ended before the '{key}' array was complete")
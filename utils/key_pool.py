@@ -0,0 +1,117 @@
+import re
+import threading
+import time
+
+# Seconds a throttled key is avoided while other keys are available
+THROTTLE_COOLDOWN = 60
+
+_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def split_keys(api_key: str) -> list[str]:
+    """Splits the api_key credential into individual keys; commas, semicolons and whitespace separate keys."""
+    keys = []
+    for key in _SEPARATORS.split(api_key or ""):
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def mask_key(key: str) -> str:
+    return f"{key[:4]}…{key[-4:]}" if len(key) > 8 else "…"
+
+
+class KeyState:
+    __slots__ = ("key", "last_throttled", "last_used", "revoked", "calls", "throttles")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.last_throttled = 0.0
+        self.last_used = 0.0
+        self.revoked = False
+        self.calls = 0
+        self.throttles = 0
+
+
+class NoUsableKeyError(Exception):
+    """Raised when every key in a pool has been revoked."""
+
+
+class KeyPool:
+    """
+    Spreads upstream calls across several Steam API keys.
+
+    Keys are chosen least-recently-throttled first, and round robin among
+    keys that have not been throttled recently. A key that gets a 429 is
+    avoided for THROTTLE_COOLDOWN seconds; a key Steam rejects as invalid is
+    removed from rotation for the life of the process.
+    """
+
+    def __init__(self, keys: list[str]):
+        self._states = [KeyState(key) for key in keys]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def acquire(self, exclude: set[str] | None = None) -> str:
+        """Returns the key to use for the next call, skipping keys in exclude where possible."""
+        now = time.monotonic()
+        with self._lock:
+            usable = [state for state in self._states if not state.revoked]
+            if not usable:
+                raise NoUsableKeyError("All configured Steam API keys have been rejected by Steam.")
+            candidates = [state for state in usable if not exclude or state.key not in exclude] or usable
+
+            def priority(state: KeyState):
+                cooling_down = now - state.last_throttled < THROTTLE_COOLDOWN if state.last_throttled else False
+                return (cooling_down, state.last_throttled if cooling_down else 0.0, state.last_used)
+
+            state = min(candidates, key=priority)
+            state.last_used = now
+            state.calls += 1
+            return state.key
+
+    def report_throttled(self, key: str) -> None:
+        with self._lock:
+            for state in self._states:
+                if state.key == key:
+                    state.last_throttled = time.monotonic()
+                    state.throttles += 1
+
+    def report_revoked(self, key: str) -> None:
+        with self._lock:
+            for state in self._states:
+                if state.key == key:
+                    state.revoked = True
+
+    def health(self) -> list[dict]:
+        """Summarizes per-key usage without exposing the keys."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key": mask_key(state.key),
+                    "revoked": state.revoked,
+                    "calls": state.calls,
+                    "throttles": state.throttles,
+                    "seconds_since_throttled": round(now - state.last_throttled) if state.last_throttled else None,
+                }
+                for state in self._states
+            ]
+
+
+_pools: dict[str, KeyPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(api_key: str) -> KeyPool:
+    """Returns the shared pool for an api_key credential value."""
+    pool = _pools.get(api_key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(api_key)
+            if pool is None:
+                pool = KeyPool(split_keys(api_key))
+                _pools[api_key] = pool
+    return pool
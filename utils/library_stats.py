@@ -0,0 +1,158 @@
+import os
+
+import numpy as np
+
+from utils.cache import ResponseCache, StripedLocks
+from utils.steam_api import get_json_with_age
+
+# Seconds a player's library columns are reused before GetOwnedGames is called again
+LIBRARY_STATS_TTL = int(os.environ.get("STEAM_LIBRARY_STATS_TTL", "600"))
+
+# Upper bound on the memory held by cached library columns, and the estimated cost of one game name
+LIBRARY_CACHE_BYTES = 16 * 1024 * 1024
+NAME_BYTES = 64
+
+# Percentiles of lifetime playtime reported over played games
+PERCENTILES = (25, 50, 75, 90, 99)
+
+# Top-N game counts the playtime concentration is reported for, besides the requested top_n
+CONCENTRATION_TOP = (1, 5, 10)
+
+
+class LibraryColumns:
+    """
+    A player's library as parallel arrays, one entry per game, playtimes in minutes.
+
+    source_age is the age in seconds of the GetOwnedGames response the columns
+    were built from when it was served stale from the response cache, else None.
+    """
+
+    __slots__ = ("appid", "playtime_forever", "playtime_2weeks", "names", "source_age")
+
+    def __init__(self, games: list[dict], source_age: float | None = None):
+        self.source_age = source_age
+        count = len(games)
+        self.appid = np.fromiter((game.get("appid", 0) for game in games), dtype=np.int64, count=count)
+        self.playtime_forever = np.fromiter((game.get("playtime_forever", 0) for game in games), dtype=np.int64, count=count)
+        self.playtime_2weeks = np.fromiter((game.get("playtime_2weeks", 0) for game in games), dtype=np.int64, count=count)
+        self.names = [game.get("name") for game in games]
+
+    def __len__(self) -> int:
+        return len(self.appid)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory held by the columns, for cache accounting."""
+        return self.appid.nbytes + self.playtime_forever.nbytes + self.playtime_2weeks.nbytes + len(self.names) * NAME_BYTES
+
+
+def hours(minutes) -> float:
+    return round(float(minutes) / 60, 1)
+
+
+def summarize(columns: LibraryColumns, top_n: int = 10) -> dict:
+    """
+    Computes aggregate playtime statistics over a whole library.
+
+    Returns:
+        Totals, percentiles of lifetime hours over played games, the share of
+        playtime held by the top N games, the never-played backlog, recent
+        (two-week) versus lifetime playtime and the top_n most played games.
+    """
+    forever = columns.playtime_forever
+    recent = columns.playtime_2weeks
+    total = int(forever.sum())
+    recent_total = int(recent.sum())
+    played = forever[forever > 0]
+
+    summary = {
+        "game_count": len(columns),
+        "played_count": int(played.size),
+        "backlog_count": len(columns) - int(played.size),
+        "total_hours": hours(total),
+        "recent_hours": hours(recent_total),
+        "recently_played_count": int(np.count_nonzero(recent)),
+        # Share of lifetime playtime spent in the last two weeks
+        "recent_to_lifetime_ratio": round(recent_total / total, 4) if total else 0.0,
+    }
+
+    if played.size:
+        summary["played_hours"] = {
+            "mean": hours(played.mean()),
+            **{f"p{p}": hours(value) for p, value in zip(PERCENTILES, np.percentile(played, PERCENTILES))},
+        }
+
+    # Games ordered most played first; cumulative sums give the top-N shares in one pass
+    order = np.argsort(forever, kind="stable")[::-1]
+    cumulative = np.cumsum(forever[order])
+    concentration = {}
+    for n in sorted({*CONCENTRATION_TOP, top_n}):
+        if n <= 0:
+            continue
+        share = cumulative[min(n, len(cumulative)) - 1] / total if total else 0.0
+        concentration[f"top_{n}"] = round(float(share), 4)
+    summary["playtime_concentration"] = concentration
+    if total:
+        summary["games_for_half_of_playtime"] = int(np.searchsorted(cumulative, total / 2)) + 1
+
+    summary["top_games"] = [
+        {
+            "appid": int(columns.appid[index]),
+            "name": columns.names[index],
+            "hours": hours(forever[index]),
+            "share": round(float(forever[index]) / total, 4),
+        }
+        for index in order[:top_n]
+        if forever[index] > 0
+    ]
+    return summary
+
+
+_libraries = ResponseCache(max_entries=256, max_bytes=LIBRARY_CACHE_BYTES)
+_build_locks = StripedLocks()
+
+
+def build_library(api_key: str, steamid: str, include_played_free_games: bool) -> LibraryColumns | None:
+    """Fetches a player's library into columns. Returns None if the game list is not visible."""
+    params = {"key": api_key, "steamid": steamid, "format": "json", "include_appinfo": 1}
+    if include_played_free_games:
+        params["include_played_free_games"] = 1
+
+    data, stale_age = get_json_with_age("IPlayerService/GetOwnedGames/v0001/", params)
+    if "response" not in data:
+        raise Exception("Invalid API response format.")
+    response = data["response"]
+    if "games" not in response:
+        # An empty library reports game_count 0; a private one omits both fields
+        return LibraryColumns([], stale_age) if response.get("game_count") == 0 else None
+    return LibraryColumns(response["games"], stale_age)
+
+
+def get_library(api_key: str, steamid: str, include_played_free_games: bool = True, refresh: bool = False) -> tuple[LibraryColumns | None, float | None]:
+    """
+    Returns the cached library columns for a player, building them on a miss.
+
+    Concurrent misses for the same player share a single build. Libraries
+    that are not visible are not cached.
+
+    Returns:
+        The columns, or None for a private library, and the age in seconds of
+        the library data when it did not come straight from Steam. The age
+        covers both the time the columns were cached and the age of a stale
+        response they were built from.
+    """
+    key = f"{api_key}|{steamid}|{int(include_played_free_games)}"
+
+    entry = _libraries.get(key)
+    if entry is not None and entry.age < LIBRARY_STATS_TTL and not refresh:
+        return entry.value, entry.age + (entry.value.source_age or 0)
+
+    with _build_locks.for_key(key):
+        entry = _libraries.get(key)
+        if entry is not None and entry.age < LIBRARY_STATS_TTL and not refresh:
+            return entry.value, entry.age + (entry.value.source_age or 0)
+
+        columns = build_library(api_key, steamid, include_played_free_games)
+        if columns is not None:
+            _libraries.set(key, columns, columns.nbytes)
+        return columns, columns.source_age if columns is not None else None
@@ -0,0 +1,131 @@
+from typing import Any
+import os
+
+from utils.cache import ResponseCache
+
+# Seconds each kind of predictable failure is remembered
+DEFAULT_TTLS = {
+    "private_profile": 1800,
+    "no_stats": 86400,
+    "not_found": 3600,
+    "empty": 600,
+}
+
+
+def _load_ttls() -> dict[str, int]:
+    """Applies STEAM_NEGATIVE_TTL overrides, e.g. "private_profile=600,empty=0"."""
+    ttls = dict(DEFAULT_TTLS)
+    for pair in os.environ.get("STEAM_NEGATIVE_TTL", "").split(","):
+        kind, _, seconds = pair.partition("=")
+        if kind.strip() and seconds.strip():
+            ttls[kind.strip()] = int(seconds)
+    return ttls
+
+
+NEGATIVE_TTLS = _load_ttls()
+
+
+class NegativeEntry:
+    """A remembered failure: either an error to re-raise or an empty body to return."""
+
+    __slots__ = ("kind", "message", "status_code", "body")
+
+    def __init__(self, kind: str, message: str | None = None, status_code: int | None = None, body: dict | None = None):
+        self.kind = kind
+        self.message = message
+        self.status_code = status_code
+        self.body = body
+
+
+def negative_key(path: str, params: dict[str, Any]) -> str:
+    """
+    Scopes negative entries to the endpoint, API key, Steam ID and AppID.
+
+    Unrelated parameters such as language or count do not change whether a
+    profile is private or a game has stats, so they are left out.
+    """
+    method = path.strip("/").split("/")[1] if "/" in path.strip("/") else path
+    steamid = params.get("steamid") or params.get("steamids") or ""
+    appid = params.get("appid") or params.get("gameid") or ""
+    return f"{method}|{params.get('key', '')}|{steamid}|{appid}"
+
+
+def classify_playerstats_error(message: str) -> str:
+    text = message.lower()
+    if "not public" in text or "private" in text:
+        return "private_profile"
+    return "no_stats"
+
+
+def classify_error(path: str, status_code: int | None, body: Any) -> str | None:
+    """
+    Classifies a failed call as a predictable negative outcome.
+
+    Returns None for failures that may succeed on retry (rate limits, server
+    errors, network problems) or that indicate a configuration problem.
+    """
+    if isinstance(body, dict) and isinstance(body.get("playerstats"), dict) and "error" in body["playerstats"]:
+        return classify_playerstats_error(str(body["playerstats"]["error"]))
+    if "GetFriendList" in path and status_code == 401:
+        # Steam answers 401 for friend lists hidden by privacy settings
+        return "private_profile"
+    if status_code == 404:
+        return "not_found"
+    return None
+
+
+def narrows_library(params: dict[str, Any]) -> bool:
+    """
+    Tells whether a GetOwnedGames request asks for only part of the library.
+
+    An empty answer to a filtered request, or to one that leaves out played
+    free games, says nothing about the full library, so it must not be
+    remembered under the Steam ID's negative key.
+    """
+    return any(name.startswith("appids_filter") for name in params) or not params.get("include_played_free_games")
+
+
+def classify_body(path: str, data: Any, params: dict[str, Any] | None = None) -> str | None:
+    """Classifies a successful response whose content is a predictable negative outcome."""
+    if not isinstance(data, dict):
+        return None
+
+    playerstats = data.get("playerstats")
+    if isinstance(playerstats, dict) and "error" in playerstats:
+        return classify_playerstats_error(str(playerstats["error"]))
+
+    response = data.get("response")
+    if not isinstance(response, dict):
+        return None
+    if "GetOwnedGames" in path and "games" not in response:
+        if response.get("game_count") != 0:
+            return "private_profile"
+        return None if narrows_library(params or {}) else "empty"
+    if "GetPlayerSummaries" in path and not response.get("players"):
+        return "not_found"
+    return None
+
+
+class NegativeCache:
+    """Remembers predictable failures per endpoint, Steam ID and AppID so repeats fail fast."""
+
+    def __init__(self, ttls: dict[str, int] = NEGATIVE_TTLS):
+        self.ttls = ttls
+        self._entries = ResponseCache()
+
+    def get(self, key: str) -> tuple[NegativeEntry, float] | None:
+        """Returns the live entry for a key and its remaining lifetime in seconds."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = self.ttls.get(entry.value.kind, 0) - entry.age
+        if remaining <= 0:
+            return None
+        return entry.value, remaining
+
+    def add(self, key: str, entry: NegativeEntry) -> None:
+        if self.ttls.get(entry.kind, 0) > 0:
+            self._entries.set(key, entry)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,171 @@
+from contextlib import closing
+import os
+import sqlite3
+import threading
+import time
+
+from utils.storage import data_path
+
+DB_FILENAME = "playtime.sqlite3"
+
+# Samples older than this are thinned out to one per bucket
+DOWNSAMPLE_AFTER_DAYS = int(os.environ.get("STEAM_PLAYTIME_DOWNSAMPLE_DAYS", "30"))
+DOWNSAMPLE_BUCKET_SECONDS = 86400
+
+# Minimum seconds between two downsampling passes in one process
+DOWNSAMPLE_INTERVAL = 3600
+
+BUCKET_SECONDS = {
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS playtime_samples (
+    steamid TEXT NOT NULL,
+    appid INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    playtime_forever INTEGER NOT NULL,
+    playtime_2weeks INTEGER NOT NULL,
+    PRIMARY KEY (steamid, appid, ts)
+) WITHOUT ROWID
+"""
+
+_initialized = set()
+_init_lock = threading.Lock()
+_last_downsample = 0.0
+
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    """Opens the sample database, creating the table on first use."""
+    path = path or data_path(DB_FILENAME)
+    connection = sqlite3.connect(path, timeout=10)
+    if path not in _initialized:
+        with _init_lock:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            connection.commit()
+            _initialized.add(path)
+    return connection
+
+
+def record_samples(steamid: str, games: list[dict], timestamp: int | None = None, path: str | None = None) -> int:
+    """
+    Appends one playtime sample per game for a Steam user.
+
+    Args:
+        steamid: The 64-bit Steam ID the samples belong to.
+        games: Entries with appid, playtime_forever and optionally playtime_2weeks, in minutes.
+        timestamp: Unix time of the observation. Defaults to now.
+
+    Returns:
+        The number of samples written.
+    """
+    timestamp = int(timestamp or time.time())
+    rows = [
+        (steamid, int(game["appid"]), timestamp, int(game.get("playtime_forever", 0)), int(game.get("playtime_2weeks", 0)))
+        for game in games
+        if game.get("appid") is not None
+    ]
+    if not rows:
+        return 0
+
+    with closing(connect(path)) as connection:
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO playtime_samples VALUES (?, ?, ?, ?, ?)", rows)
+        _maybe_downsample(connection, timestamp)
+    return len(rows)
+
+
+def _maybe_downsample(connection: sqlite3.Connection, now: int) -> None:
+    global _last_downsample
+    if time.monotonic() - _last_downsample < DOWNSAMPLE_INTERVAL:
+        return
+    _last_downsample = time.monotonic()
+    downsample(connection, now - DOWNSAMPLE_AFTER_DAYS * 86400)
+
+
+def downsample(connection: sqlite3.Connection, cutoff: int, bucket: int = DOWNSAMPLE_BUCKET_SECONDS) -> int:
+    """
+    Keeps only the latest sample per (steamid, appid, bucket) for samples older than cutoff.
+
+    playtime_forever is cumulative, so the latest sample of a bucket carries
+    all the information needed for trends at that resolution.
+
+    Returns:
+        The number of samples removed.
+    """
+    with connection:
+        cursor = connection.execute(
+            """
+            DELETE FROM playtime_samples
+            WHERE ts < :cutoff AND EXISTS (
+                SELECT 1 FROM playtime_samples AS newer
+                WHERE newer.steamid = playtime_samples.steamid
+                  AND newer.appid = playtime_samples.appid
+                  AND newer.ts > playtime_samples.ts
+                  AND newer.ts < :cutoff
+                  AND newer.ts / :bucket = playtime_samples.ts / :bucket
+            )
+            """,
+            {"cutoff": cutoff, "bucket": bucket},
+        )
+    return cursor.rowcount
+
+
+def query_trends(steamid: str, since: int, interval: str = "week", appid: int | None = None, path: str | None = None) -> dict:
+    """
+    Aggregates recorded samples into minutes played per interval.
+
+    Minutes played in a bucket are the growth of playtime_forever since the
+    previous observation, so the result does not depend on how often samples
+    were taken. A game's first observation with no earlier sample only
+    establishes its starting point.
+
+    Returns:
+        A dict with "buckets" (sorted bucket start time -> minutes played across
+        all games), "games" (appid -> minutes played in the window) and
+        "sample_count".
+    """
+    bucket_seconds = BUCKET_SECONDS[interval]
+    filters = "steamid = :steamid"
+    if appid is not None:
+        filters += " AND appid = :appid"
+    params = {"steamid": steamid, "appid": appid, "since": since, "bucket": bucket_seconds}
+
+    with closing(connect(path)) as connection:
+        # Last observation before the window, used as the starting point of each game
+        baseline = dict(connection.execute(
+            f"SELECT appid, MAX(playtime_forever) FROM playtime_samples WHERE {filters} AND ts < :since GROUP BY appid",
+            params,
+        ).fetchall())
+        rows = connection.execute(
+            f"""
+            SELECT appid, ts / :bucket AS bucket, MAX(playtime_forever), COUNT(*)
+            FROM playtime_samples
+            WHERE {filters} AND ts >= :since
+            GROUP BY appid, bucket
+            ORDER BY appid, bucket
+            """,
+            params,
+        ).fetchall()
+
+    buckets: dict[int, int] = {}
+    games: dict[int, int] = {}
+    sample_count = 0
+    previous_appid = None
+    previous = None
+    for game_appid, bucket, playtime, count in rows:
+        sample_count += count
+        if game_appid != previous_appid:
+            previous_appid = game_appid
+            previous = baseline.get(game_appid)
+        played = max(playtime - previous, 0) if previous is not None else 0
+        previous = playtime
+
+        start = bucket * bucket_seconds
+        buckets[start] = buckets.get(start, 0) + played
+        games[game_appid] = games.get(game_appid, 0) + played
+
+    return {"buckets": dict(sorted(buckets.items())), "games": games, "sample_count": sample_count}
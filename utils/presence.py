@@ -0,0 +1,153 @@
+import threading
+import time
+
+from utils.steam_api import fetch_json, run_concurrently
+
+# GetPlayerSummaries accepts at most this many Steam IDs per call
+SUMMARIES_BATCH_SIZE = 100
+
+PERSONA_STATES = {
+    0: "Offline",
+    1: "Online",
+    2: "Busy",
+    3: "Away",
+    4: "Snooze",
+    5: "Looking to Trade",
+    6: "Looking to Play",
+}
+
+# Starting point and bounds of the adaptive poll interval, in seconds
+DEFAULT_INTERVAL = 60
+MIN_INTERVAL = 15
+MAX_INTERVAL = 300
+
+# Watches not polled for this long are dropped
+WATCH_EXPIRY = 24 * 3600
+
+
+class Presence:
+    """The presence fields of one player that changes are detected on."""
+
+    __slots__ = ("personastate", "gameid", "game", "personaname")
+
+    def __init__(self, player: dict):
+        self.personastate = player.get("personastate", 0)
+        self.gameid = player.get("gameid")
+        self.game = player.get("gameextrainfo")
+        self.personaname = player.get("personaname")
+
+    @property
+    def online(self) -> bool:
+        return self.personastate != 0
+
+
+def fetch_presence(api_key: str, steamids: list[str]) -> tuple[dict[str, Presence], int]:
+    """
+    Fetches current presence for any number of players.
+
+    Steam IDs are split into batches of 100 and the batches are requested
+    concurrently. Responses bypass the response cache, since a cached
+    summary would hide the changes being watched for.
+
+    Returns:
+        Presence by Steam ID for every player Steam returned, and the number
+        of batches that failed.
+    """
+    batches = [steamids[i:i + SUMMARIES_BATCH_SIZE] for i in range(0, len(steamids), SUMMARIES_BATCH_SIZE)]
+    responses = run_concurrently({
+        index: (lambda batch=batch: fetch_json("ISteamUser/GetPlayerSummaries/v0002/", {"key": api_key, "steamids": ",".join(batch)}))
+        for index, batch in enumerate(batches)
+    })
+
+    presence = {}
+    failed = 0
+    for response in responses.values():
+        if isinstance(response, Exception) or "response" not in response:
+            failed += 1
+            continue
+        for player in response["response"].get("players", []):
+            if player.get("steamid"):
+                presence[player["steamid"]] = Presence(player)
+    return presence, failed
+
+
+def diff_presence(steamid: str, before: Presence, after: Presence) -> list[dict]:
+    """Describes what changed between two observations of one player."""
+    events = []
+    base = {"steamid": steamid, "personaname": after.personaname}
+
+    if before.online != after.online:
+        events.append({**base, "change": "came_online" if after.online else "went_offline"})
+    elif before.personastate != after.personastate:
+        events.append({
+            **base,
+            "change": "status_changed",
+            "from": PERSONA_STATES.get(before.personastate, "Unknown"),
+            "to": PERSONA_STATES.get(after.personastate, "Unknown"),
+        })
+
+    if before.gameid != after.gameid:
+        if after.gameid and not before.gameid:
+            events.append({**base, "change": "started_game", "gameid": after.gameid, "game": after.game})
+        elif before.gameid and not after.gameid:
+            events.append({**base, "change": "stopped_game", "gameid": before.gameid, "game": before.game})
+        else:
+            events.append({**base, "change": "switched_game", "from": before.game, "to": after.game, "gameid": after.gameid})
+
+    return events
+
+
+class PresenceWatch:
+    """
+    Last-known presence for one watched set of players, with an adaptive poll interval.
+
+    The interval halves after a tick with changes and grows by half after a
+    quiet tick, within MIN_INTERVAL and MAX_INTERVAL.
+    """
+
+    def __init__(self):
+        self.table: dict[str, Presence] = {}
+        self.interval = float(DEFAULT_INTERVAL)
+        self.last_polled = 0.0
+        self.lock = threading.Lock()
+
+    def update(self, current: dict[str, Presence]) -> tuple[list[dict], int]:
+        """
+        Replaces the known presence with current and returns the changes.
+
+        Players seen for the first time only establish a baseline. Players
+        missing from current keep their last-known presence, so a failed batch
+        does not look like everyone going offline.
+
+        Returns:
+            The change events and the number of players seen for the first time.
+        """
+        events = []
+        new = 0
+        for steamid, presence in current.items():
+            before = self.table.get(steamid)
+            if before is None:
+                new += 1
+            else:
+                events.extend(diff_presence(steamid, before, presence))
+            self.table[steamid] = presence
+
+        self.interval = max(MIN_INTERVAL, self.interval / 2) if events else min(MAX_INTERVAL, self.interval * 1.5)
+        self.last_polled = time.monotonic()
+        return events, new
+
+
+_watches: dict[str, PresenceWatch] = {}
+_watches_lock = threading.Lock()
+
+
+def get_watch(key: str) -> PresenceWatch:
+    """Returns the watch for key, dropping watches that have not been polled for a day."""
+    now = time.monotonic()
+    with _watches_lock:
+        for stale in [name for name, watch in _watches.items() if watch.last_polled and now - watch.last_polled > WATCH_EXPIRY]:
+            del _watches[stale]
+        watch = _watches.get(key)
+        if watch is None:
+            watch = _watches[key] = PresenceWatch()
+        return watch
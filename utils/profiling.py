@@ -0,0 +1,218 @@
+from collections.abc import Callable, Generator
+from contextlib import contextmanager, nullcontext
+from typing import Any
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+
+from utils.storage import data_path
+
+# "1" or "true" profiles every invocation; a comma-separated list of tool names profiles only those
+PROFILE_TOOLS = os.environ.get("STEAM_PROFILE", "").strip()
+
+# Where reports go: "file" writes under STEAM_DATA_DIR/profiles, "log" emits one structured log record
+PROFILE_OUTPUT = os.environ.get("STEAM_PROFILE_OUTPUT", "file")
+
+# Number of functions listed in a report, by cumulative time
+TOP_FUNCTIONS = 25
+
+# Phases measured explicitly; time not spent in them on the invoking thread counts as result shaping
+PHASES = ("upstream_io", "json_decode", "concurrent_wait")
+
+logger = logging.getLogger(__name__)
+
+_active: contextvars.ContextVar["InvocationProfile | None"] = contextvars.ContextVar("steam_profile", default=None)
+
+_NOT_PROFILED = nullcontext()
+
+# cProfile allows one active profiler per process (Python 3.12) and sees every greenlet of
+# a thread under gevent, so only one invocation is profiled at a time
+_profiler_lock = threading.Lock()
+
+
+def profiling_requested(tool: str, tool_parameters: dict[str, Any]) -> bool:
+    """Tells whether an invocation should be profiled, from its profile parameter or STEAM_PROFILE."""
+    if str(tool_parameters.get("profile", "false")).lower() == "true":
+        return True
+    if not PROFILE_TOOLS:
+        return False
+    if PROFILE_TOOLS.lower() in ("1", "true", "*"):
+        return True
+    return tool in {name.strip() for name in PROFILE_TOOLS.split(",")}
+
+
+def phase(name: str):
+    """
+    Returns a context manager timing a block as one phase of the profiled invocation.
+
+    Outside a profiled invocation this is a shared no-op context manager, so
+    instrumented code pays only for a context variable lookup.
+    """
+    profile = _active.get()
+    if profile is None:
+        return _NOT_PROFILED
+    return profile.measure(name)
+
+
+class InvocationProfile:
+    """
+    A cProfile capture of one tool invocation, split into phases.
+
+    Phase totals are summed over all threads, so concurrent upstream calls can
+    add up to more than the wall time. The invoking thread's own time in each
+    phase is tracked separately; whatever remains of the wall time is result
+    shaping.
+
+    If the profiler cannot be enabled, for example because a debugger or
+    coverage tool already holds the profiling hook, the invocation continues
+    with phase timings only and the report says why cProfile data is missing.
+    """
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.owner = threading.get_ident()
+        self.phases = {name: 0.0 for name in PHASES}
+        self.owner_phases = {name: 0.0 for name in PHASES}
+        self.counts = {name: 0 for name in PHASES}
+        self.profiler = cProfile.Profile()
+        self.unprofiled_reason: str | None = None
+        self.wall = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+                self.counts[name] = self.counts.get(name, 0) + 1
+                if threading.get_ident() == self.owner:
+                    self.owner_phases[name] = self.owner_phases.get(name, 0.0) + elapsed
+
+    def step(self, context: contextvars.Context, messages: Generator) -> Any:
+        """Advances the tool's generator by one message under the profiler."""
+        started = time.perf_counter()
+        enabled = False
+        if self.unprofiled_reason is None:
+            try:
+                self.profiler.enable()
+                enabled = True
+            except ValueError as e:
+                self.unprofiled_reason = str(e)
+        try:
+            return context.run(next, messages)
+        finally:
+            if enabled:
+                self.profiler.disable()
+            self.wall += time.perf_counter() - started
+
+    def report(self, error: BaseException | None = None) -> dict:
+        stream = io.StringIO()
+        try:
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        except TypeError:
+            # Raised for a profiler that never collected anything
+            pass
+
+        shaping = max(self.wall - sum(self.owner_phases.values()), 0.0)
+        report = {
+            "tool": self.tool,
+            "timestamp": int(time.time()),
+            "wall_seconds": round(self.wall, 6),
+            "phases": {
+                **{
+                    name: {"seconds": round(seconds, 6), "count": self.counts[name]}
+                    for name, seconds in self.phases.items()
+                },
+                "result_shaping": {"seconds": round(shaping, 6)},
+            },
+            "profile": stream.getvalue(),
+        }
+        if self.unprofiled_reason is not None:
+            report["unprofiled_reason"] = self.unprofiled_reason
+        if error is not None:
+            report["error"] = str(error)
+        return report
+
+    def write(self, error: BaseException | None = None) -> str | None:
+        """Writes the report to a file or the log, returning the file path if one was written."""
+        report = self.report(error)
+        if PROFILE_OUTPUT == "log":
+            logger.info("steam tool profile %s", json.dumps(report))
+            return None
+
+        os.makedirs(data_path("profiles"), exist_ok=True)
+        base = os.path.join(data_path("profiles"), f"{self.tool}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}")
+        if self.unprofiled_reason is None:
+            self.profiler.dump_stats(base + ".prof")
+        with open(base + ".json", "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        return base + ".json"
+
+
+def run_profiled(tool: str, context: contextvars.Context, messages: Generator) -> Generator:
+    """
+    Drives a tool's generator under an InvocationProfile and writes the report when it ends.
+
+    A failure to write the report is logged and never fails the invocation.
+    """
+    profile = InvocationProfile(tool)
+    context.run(_active.set, profile)
+    error = None
+    try:
+        while True:
+            try:
+                message = profile.step(context, messages)
+            except StopIteration:
+                return
+            yield message
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        try:
+            profile.write(error)
+        except Exception:
+            logger.exception("Failed to write the profile of %s", tool)
+
+
+def profiled(tool: str) -> Callable:
+    """
+    Decorates a tool's _invoke so invocations selected by STEAM_PROFILE or the
+    profile parameter are profiled.
+
+    Apply it outside metered, so the quota scope and the profile share one
+    context. While another invocation is being profiled, the invocation runs
+    unprofiled and the skip is logged; profiling never fails a tool call.
+    """
+    def decorator(invoke: Callable[..., Generator]) -> Callable[..., Generator]:
+        @functools.wraps(invoke)
+        def wrapper(self, tool_parameters: dict[str, Any]) -> Generator:
+            if not profiling_requested(tool, tool_parameters):
+                yield from invoke(self, tool_parameters)
+                return
+            if not _profiler_lock.acquire(blocking=False):
+                logger.info("Not profiling %s: another invocation is being profiled", tool)
+                yield from invoke(self, tool_parameters)
+                return
+            try:
+                context = contextvars.copy_context()
+                yield from run_profiled(tool, context, context.run(invoke, self, tool_parameters))
+            finally:
+                _profiler_lock.release()
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,296 @@
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from typing import Any
+import contextvars
+import functools
+import hashlib
+import math
+import os
+import threading
+import time
+
+# Length of the accounting window budgets apply to, in seconds
+WINDOW_SECONDS = int(os.environ.get("STEAM_QUOTA_WINDOW", "60"))
+
+# Upstream calls in flight across all workspaces before admission control queues or rejects
+CAPACITY = int(os.environ.get("STEAM_MAX_INFLIGHT", "32"))
+
+# Seconds a normal-priority call waits for a slot under contention before it is rejected
+QUEUE_TIMEOUT = float(os.environ.get("STEAM_QUOTA_QUEUE_TIMEOUT", "10"))
+
+
+def _parse_limits(value: str) -> dict[str, str]:
+    """Parses "name=value,name=value" environment settings."""
+    limits = {}
+    for pair in value.split(","):
+        name, _, setting = pair.partition("=")
+        if name.strip() and setting.strip():
+            limits[name.strip()] = setting.strip()
+    return limits
+
+
+# Per-workspace budgets per window; 0 means unlimited
+TENANT_CALL_BUDGET = int(os.environ.get("STEAM_TENANT_CALL_BUDGET", "0"))
+TENANT_BYTE_BUDGET = int(os.environ.get("STEAM_TENANT_BYTE_BUDGET", "0"))
+
+# Per-workspace, per-tool call budgets per window, e.g. "steam_player_achievements=120,*=600"
+TOOL_CALL_BUDGETS = {name: int(calls) for name, calls in _parse_limits(os.environ.get("STEAM_TOOL_CALL_BUDGET", "")).items()}
+
+# Tool priorities, e.g. "steam_news=low"; tools default to normal
+TOOL_PRIORITIES = _parse_limits(os.environ.get("STEAM_TOOL_PRIORITY", ""))
+
+UNKNOWN_TOOL = "unknown"
+
+_scope: contextvars.ContextVar[tuple[str | None, str, str]] = contextvars.ContextVar("steam_quota_scope", default=(None, UNKNOWN_TOOL, "normal"))
+
+
+class QuotaExceededError(Exception):
+    """Raised when a workspace is over budget or admission control turns a call away."""
+
+    def __init__(self, message: str, retry_after: int | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def tenant_id(api_key: str | None) -> str:
+    """
+    Identifies the workspace behind a call.
+
+    Each Dify workspace configures its own provider credentials, so the
+    api_key credential identifies the workspace without storing the key.
+    """
+    if not api_key:
+        return "anonymous"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def tool_budget(tool: str) -> int:
+    return TOOL_CALL_BUDGETS.get(tool, TOOL_CALL_BUDGETS.get("*", 0))
+
+
+def metered(tool: str) -> Callable:
+    """
+    Decorates a tool's _invoke so upstream calls it makes are accounted to the
+    tool and to the workspace of its credentials, including calls to
+    endpoints that take no API key.
+
+    The scope lives in a context of its own, so it is neither lost nor leaked
+    while the generator is suspended between messages.
+    """
+    priority = TOOL_PRIORITIES.get(tool, "normal")
+
+    def decorator(invoke: Callable[..., Generator]) -> Callable[..., Generator]:
+        @functools.wraps(invoke)
+        def wrapper(self, tool_parameters: dict[str, Any]) -> Generator:
+            context = contextvars.copy_context()
+            tenant = tenant_id(self.runtime.credentials.get("api_key"))
+            context.run(_scope.set, (tenant, tool, priority))
+            messages = context.run(invoke, self, tool_parameters)
+            while True:
+                try:
+                    message = context.run(next, messages)
+                except StopIteration:
+                    return
+                yield message
+
+        return wrapper
+
+    return decorator
+
+
+def current_scope() -> tuple[str | None, str, str]:
+    """Returns the (workspace, tool, priority) the current upstream call is accounted to."""
+    return _scope.get()
+
+
+def background_context() -> contextvars.Context:
+    """Returns a copy of the current context with low priority, for work no caller is waiting on."""
+    context = contextvars.copy_context()
+    tenant, tool, _ = _scope.get()
+    context.run(_scope.set, (tenant, tool, "low"))
+    return context
+
+
+class Usage:
+    __slots__ = ("calls", "bytes", "rejected", "queued")
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.rejected = 0
+        self.queued = 0
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "bytes": self.bytes, "rejected": self.rejected, "queued": self.queued}
+
+
+class TenantUsage:
+    """Accounting for one workspace: the current window per tool, and lifetime totals."""
+
+    __slots__ = ("window_start", "window", "tools", "totals")
+
+    def __init__(self, now: float):
+        self.window_start = now
+        self.window = Usage()
+        self.tools: dict[str, Usage] = {}
+        self.totals = Usage()
+
+    def roll(self, now: float) -> None:
+        if now - self.window_start >= WINDOW_SECONDS:
+            self.window_start = now
+            self.window = Usage()
+            self.tools = {}
+
+    def tool(self, name: str) -> Usage:
+        usage = self.tools.get(name)
+        if usage is None:
+            usage = self.tools[name] = Usage()
+        return usage
+
+    def retry_after(self, now: float) -> int:
+        return max(1, math.ceil(WINDOW_SECONDS - (now - self.window_start)))
+
+
+class QuotaManager:
+    """
+    Per-workspace and per-tool accounting of upstream calls and bytes, with admission control.
+
+    A call is rejected outright when its workspace or tool is over budget for
+    the current window. Otherwise it needs one of CAPACITY in-flight slots.
+    While slots are free and nobody is queued, calls are admitted directly;
+    under contention each active workspace gets an equal share of the slots,
+    normal-priority calls queue for up to QUEUE_TIMEOUT seconds and
+    low-priority calls are rejected so they never hold up interactive work.
+    """
+
+    def __init__(self, capacity: int = CAPACITY, queue_timeout: float = QUEUE_TIMEOUT):
+        self.capacity = capacity
+        self.queue_timeout = queue_timeout
+        self._tenants: dict[str, TenantUsage] = {}
+        self._inflight: dict[str, int] = {}
+        self._waiting: dict[str, int] = {}
+        self._condition = threading.Condition()
+
+    def _tenant(self, tenant: str, now: float) -> TenantUsage:
+        usage = self._tenants.get(tenant)
+        if usage is None:
+            usage = self._tenants[tenant] = TenantUsage(now)
+        usage.roll(now)
+        return usage
+
+    def _check_budget(self, tool: str, usage: TenantUsage, now: float) -> None:
+        reason = None
+        if TENANT_CALL_BUDGET and usage.window.calls >= TENANT_CALL_BUDGET:
+            reason = f"the workspace has used its budget of {TENANT_CALL_BUDGET} Steam API calls"
+        elif TENANT_BYTE_BUDGET and usage.window.bytes >= TENANT_BYTE_BUDGET:
+            reason = f"the workspace has used its budget of {TENANT_BYTE_BUDGET} bytes from the Steam API"
+        elif tool_budget(tool) and usage.tool(tool).calls >= tool_budget(tool):
+            reason = f"{tool} has used its budget of {tool_budget(tool)} Steam API calls"
+        if reason:
+            retry_after = usage.retry_after(now)
+            self._reject(tool, usage, f"Quota exceeded: {reason} per {WINDOW_SECONDS} seconds. Retry after {retry_after} seconds.", retry_after)
+
+    def _admissible(self, tenant: str) -> bool:
+        inflight_total = sum(self._inflight.values())
+        if inflight_total >= self.capacity:
+            return False
+        others_waiting = any(count for name, count in self._waiting.items() if name != tenant)
+        if not others_waiting:
+            return True
+        active = {name for name, count in self._inflight.items() if count}
+        active |= {name for name, count in self._waiting.items() if count}
+        active.add(tenant)
+        return self._inflight.get(tenant, 0) < max(1, self.capacity // len(active))
+
+    def _reject(self, tool: str, usage: TenantUsage, message: str, retry_after: int = 1) -> None:
+        usage.window.rejected += 1
+        usage.tool(tool).rejected += 1
+        usage.totals.rejected += 1
+        raise QuotaExceededError(message, retry_after)
+
+    @contextmanager
+    def admit(self, api_key: str | None):
+        """
+        Holds an in-flight slot for one upstream call.
+
+        The call is accounted to the workspace of the calling tool, or to the
+        workspace of api_key outside a metered tool.
+
+        Yields a callable taking the number of response bytes, which the
+        caller reports once the response has arrived.
+
+        Raises:
+            QuotaExceededError: If the workspace or tool is over budget, or no slot is available in time.
+        """
+        tenant, tool, priority = current_scope()
+        tenant = tenant or tenant_id(api_key)
+
+        with self._condition:
+            now = time.monotonic()
+            usage = self._tenant(tenant, now)
+            self._check_budget(tool, usage, now)
+
+            if not self._admissible(tenant):
+                if priority == "low":
+                    self._reject(tool, usage, "The Steam API is busy serving other requests; low-priority call rejected. Retry shortly.")
+                usage.window.queued += 1
+                usage.tool(tool).queued += 1
+                usage.totals.queued += 1
+                self._waiting[tenant] = self._waiting.get(tenant, 0) + 1
+                try:
+                    admitted = self._condition.wait_for(lambda: self._admissible(tenant), self.queue_timeout)
+                finally:
+                    self._waiting[tenant] -= 1
+                if not admitted:
+                    self._reject(tool, usage, f"The Steam API is busy serving other requests; no slot became free within {self.queue_timeout:g} seconds.")
+
+            self._inflight[tenant] = self._inflight.get(tenant, 0) + 1
+            # Count the call up front so concurrent calls cannot overshoot a budget
+            usage.window.calls += 1
+            usage.tool(tool).calls += 1
+            usage.totals.calls += 1
+
+        def record_bytes(size: int) -> None:
+            with self._condition:
+                usage.window.bytes += size
+                usage.tool(tool).bytes += size
+                usage.totals.bytes += size
+
+        try:
+            yield record_bytes
+        finally:
+            with self._condition:
+                self._inflight[tenant] -= 1
+                self._condition.notify_all()
+
+    def usage(self, api_key: str | None) -> dict:
+        """Reports a workspace's usage in the current window, its budgets and the shared contention state."""
+        tenant = tenant_id(api_key)
+        with self._condition:
+            now = time.monotonic()
+            usage = self._tenant(tenant, now)
+            return {
+                "workspace": tenant,
+                "window_seconds": WINDOW_SECONDS,
+                "window_resets_in_seconds": usage.retry_after(now),
+                "window": usage.window.as_dict(),
+                "tools": {
+                    name: {**tool_usage.as_dict(), "call_budget": tool_budget(name) or None}
+                    for name, tool_usage in sorted(usage.tools.items())
+                },
+                "totals": usage.totals.as_dict(),
+                "budgets": {
+                    "calls": TENANT_CALL_BUDGET or None,
+                    "bytes": TENANT_BYTE_BUDGET or None,
+                },
+                "admission": {
+                    "capacity": self.capacity,
+                    "in_flight": sum(self._inflight.values()),
+                    "in_flight_for_workspace": self._inflight.get(tenant, 0),
+                    "queued": sum(self._waiting.values()),
+                    "active_workspaces": len({name for name, count in self._inflight.items() if count} | {name for name, count in self._waiting.items() if count}),
+                },
+            }
+
+
+quota_manager = QuotaManager()
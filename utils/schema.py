@@ -0,0 +1,93 @@
+import os
+
+from utils.cache import ResponseCache, StripedLocks
+from utils.steam_api import get_json
+
+# Seconds a parsed game schema is kept; schemas change only when a game is patched
+SCHEMA_TTL = int(os.environ.get("STEAM_SCHEMA_TTL", "86400"))
+
+DEFAULT_LANGUAGE = "english"
+
+
+class AchievementSchema:
+    __slots__ = ("display_name", "description", "icon", "icongray", "hidden")
+
+    def __init__(self, achievement: dict):
+        self.display_name = achievement.get("displayName")
+        self.description = achievement.get("description")
+        self.icon = achievement.get("icon")
+        self.icongray = achievement.get("icongray")
+        self.hidden = achievement.get("hidden") == 1
+
+
+class GameSchema:
+    """Localized display data for one game's achievements and stats."""
+
+    __slots__ = ("game_name", "achievements", "stats")
+
+    def __init__(self, data: dict):
+        game = data.get("game") or {}
+        available = game.get("availableGameStats") or {}
+        self.game_name = game.get("gameName")
+        self.achievements = {
+            achievement["name"]: AchievementSchema(achievement)
+            for achievement in available.get("achievements", [])
+            if "name" in achievement
+        }
+        self.stats = {
+            stat["name"]: stat.get("displayName") or stat["name"]
+            for stat in available.get("stats", [])
+            if "name" in stat
+        }
+
+    def describe_achievement(self, apiname: str, achieved: bool) -> dict:
+        """
+        Returns the display fields for one achievement.
+
+        Hidden achievements keep their description secret until unlocked,
+        matching what the Steam client shows.
+        """
+        achievement = self.achievements.get(apiname)
+        if achievement is None:
+            return {}
+
+        info = {"name": achievement.display_name}
+        if achievement.hidden:
+            info["hidden"] = True
+        if achievement.description and (achieved or not achievement.hidden):
+            info["description"] = achievement.description
+        icon = achievement.icon if achieved else achievement.icongray
+        if icon:
+            info["icon"] = icon
+        return info
+
+
+_schemas = ResponseCache(max_entries=256)
+_fetch_locks = StripedLocks()
+
+
+def get_game_schema(api_key: str, appid: str, language: str = "") -> GameSchema:
+    """
+    Returns the cached schema for (appid, language), fetching GetSchemaForGame on a miss.
+
+    Concurrent misses for the same key share a single upstream call.
+
+    Raises:
+        SteamAPIError: If the schema cannot be fetched.
+    """
+    language = language or DEFAULT_LANGUAGE
+    key = f"{appid}|{language}"
+
+    entry = _schemas.get(key)
+    if entry is not None and entry.age < SCHEMA_TTL:
+        return entry.value
+
+    with _fetch_locks.for_key(key):
+        entry = _schemas.get(key)
+        if entry is not None and entry.age < SCHEMA_TTL:
+            return entry.value
+
+        data = get_json("ISteamUserStats/GetSchemaForGame/v2/", {"key": api_key, "appid": appid, "l": language})
+        schema = GameSchema(data)
+        _schemas.set(key, schema)
+        return schema
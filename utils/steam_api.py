@@ -0,0 +1,373 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any
+from urllib.parse import urlencode
+import contextvars
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cache import MAX_BYTES, ResponseCache, policy_for
+from utils.cassette import cassette_adapter
+from utils.codec import loads
+from utils.key_pool import NoUsableKeyError, get_pool
+from utils.negative_cache import NegativeCache, NegativeEntry, classify_body, classify_error, negative_key
+from utils.profiling import phase
+from utils.quota import QuotaExceededError, background_context, quota_manager
+
+# Overridable so the tools can be pointed at a local stand-in server
+API_BASE_URL = os.environ.get("STEAM_API_BASE_URL", "http://api.steampowered.com").rstrip("/")
+STORE_BASE_URL = os.environ.get("STEAM_STORE_BASE_URL", "https://store.steampowered.com").rstrip("/")
+
+# Upper bound on parallel upstream calls issued by a single invocation
+MAX_WORKERS = 16
+
+# Workers the current task may still start; nested run_concurrently calls split
+# their caller's share, so an invocation never has more than MAX_WORKERS calls in flight
+_worker_share = contextvars.ContextVar("steam_worker_share", default=MAX_WORKERS)
+
+# Seconds to wait for Steam before giving up on a single request
+REQUEST_TIMEOUT = 30
+
+_session = None
+_session_lock = threading.Lock()
+
+response_cache = ResponseCache(max_bytes=MAX_BYTES)
+negative_cache = NegativeCache()
+
+# Cache keys with a background refresh in flight
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+class SteamAPIError(Exception):
+    """Raised when a Steam Web API call fails or returns an unusable response."""
+
+    def __init__(self, message: str, status_code: int | None = None, body: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session.
+
+    The session is shared by all tools so that keep-alive connections to
+    api.steampowered.com are reused across calls and threads. With
+    STEAM_CASSETTE_MODE set, its adapter records exchanges to or replays
+    them from a cassette instead.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                pool_options = {"pool_connections": 4, "pool_maxsize": MAX_WORKERS}
+                adapter = cassette_adapter(**pool_options) or HTTPAdapter(**pool_options)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def check_status(response: requests.Response) -> None:
+    """Raises a SteamAPIError describing a non-200 response."""
+    status_code = response.status_code
+    if status_code == 200:
+        return
+
+    # Stats endpoints explain 400/403 responses in a playerstats.error field
+    try:
+        body = loads(response.content)
+    except ValueError:
+        body = None
+    playerstats = body.get("playerstats") if isinstance(body, dict) else None
+    if isinstance(playerstats, dict) and "error" in playerstats:
+        raise SteamAPIError(f"Steam API returned an error: {playerstats['error']}", status_code, body)
+
+    if status_code == 401:
+        raise SteamAPIError("API key is invalid or unauthorized.", status_code)
+    if status_code == 403:
+        raise SteamAPIError("Access denied. The API key may not have sufficient permissions.", status_code)
+    if status_code == 404:
+        raise SteamAPIError("No data found. The user might not exist or the profile is not public.", status_code)
+    raise SteamAPIError(f"Steam API request failed with status code: {status_code}", status_code)
+
+
+def _is_key_rejection(response: requests.Response) -> bool:
+    """Tells a 403 for an invalid or revoked key apart from a stats endpoint's privacy error."""
+    if response.status_code != 403:
+        return False
+    try:
+        body = loads(response.content)
+    except ValueError:
+        return True
+    return not (isinstance(body, dict) and "playerstats" in body)
+
+
+def send_request(path: str, params: dict[str, Any], stream: bool = False, base_url: str | None = None) -> requests.Response:
+    """
+    Sends a GET request, spreading calls across the keys in the api_key credential.
+
+    base_url defaults to the Web API host; the store API is reached the same
+    way with STORE_BASE_URL.
+
+    The "key" parameter may hold several comma-separated keys. Each attempt
+    uses the key the pool picks; a 429 marks the key as throttled and an
+    invalid-key 403 removes it from rotation, and the call is retried once
+    with each other key before the last response is returned.
+
+    Every attempt is admitted and accounted by the quota manager against the
+    calling workspace and tool.
+
+    Raises:
+        SteamAPIError: If the request cannot be sent, no key is usable, or the
+            quota manager rejects the call (status 429).
+    """
+    url = f"{base_url or API_BASE_URL}/{path}"
+    pool = get_pool(params["key"]) if params.get("key") else None
+    attempts = len(pool) if pool else 1
+    tried = set()
+
+    for attempt in range(attempts):
+        request_params = params
+        if pool:
+            try:
+                key = pool.acquire(tried)
+            except NoUsableKeyError as e:
+                raise SteamAPIError(str(e), 403)
+            tried.add(key)
+            request_params = {**params, "key": key}
+
+        try:
+            with quota_manager.admit(params.get("key")) as record_bytes:
+                with phase("upstream_io"):
+                    response = get_session().get(url, params=request_params, timeout=REQUEST_TIMEOUT, stream=stream)
+                    # Streamed bodies have not been read yet, so they are accounted by their declared length
+                    record_bytes(int(response.headers.get("Content-Length") or 0) if stream else len(response.content))
+        except QuotaExceededError as e:
+            raise SteamAPIError(str(e), 429)
+        except requests.RequestException as e:
+            raise SteamAPIError(f"Steam API request failed: {str(e)}")
+
+        if pool is None:
+            return response
+
+        retry = False
+        if response.status_code == 429:
+            pool.report_throttled(key)
+            retry = True
+        elif len(pool) > 1 and _is_key_rejection(response):
+            # With a single key there is nothing to rotate to, so it is never dropped
+            pool.report_revoked(key)
+            retry = True
+
+        if not retry or attempt == attempts - 1:
+            return response
+        response.close()
+
+    return response
+
+
+def fetch_json(path: str, params: dict[str, Any], base_url: str | None = None) -> dict:
+    """
+    Performs an uncached GET request against the Steam Web API and returns the decoded body.
+
+    Raises:
+        SteamAPIError: If the request fails or the body is not valid JSON.
+    """
+    return _fetch_sized(path, params, base_url)[0]
+
+
+def _fetch_sized(path: str, params: dict[str, Any], base_url: str | None = None) -> tuple[dict, int]:
+    """Like fetch_json, also returning the size of the response body in bytes for cache accounting."""
+    response = send_request(path, params, base_url=base_url)
+    check_status(response)
+
+    try:
+        with phase("json_decode"):
+            # Decoded from the body bytes, skipping the text copy and charset detection of response.json()
+            return loads(response.content), len(response.content)
+    except ValueError:
+        raise SteamAPIError("Invalid API response format")
+
+
+def cache_key(path: str, params: dict[str, Any]) -> str:
+    return f"{path}?{urlencode(sorted(params.items()))}"
+
+
+def _refresh(key: str, path: str, params: dict[str, Any]) -> None:
+    try:
+        response_cache.set(key, *_fetch_sized(path, params))
+    except Exception:
+        # Keep serving the stale entry; the next caller past the window fetches synchronously
+        pass
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, path: str, params: dict[str, Any]) -> None:
+    """Starts a background refresh of a cache entry unless one is already running."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    # Refreshes are accounted to the tool that triggered them, at low priority
+    threading.Thread(target=background_context().run, args=(_refresh, key, path, params), daemon=True).start()
+
+
+def get_json_with_age(path: str, params: dict[str, Any]) -> tuple[dict, float | None]:
+    """
+    Returns a Steam Web API response, applying the endpoint's stale-while-revalidate policy.
+
+    See get_json_observed; this omits whether the body was fetched by this call.
+    """
+    return get_json_observed(path, params)[:2]
+
+
+def get_json_observed(path: str, params: dict[str, Any]) -> tuple[dict, float | None, bool]:
+    """
+    Returns a Steam Web API response, applying the endpoint's stale-while-revalidate policy.
+
+    Predictable failures (private profiles, games without stats, missing
+    users, empty libraries) are remembered per Steam ID and AppID and
+    answered from the negative cache without calling Steam until they expire.
+
+    Fresh cached responses are returned as-is. Responses past their TTL but
+    within the endpoint's stale window are returned immediately while a single
+    background refresh updates the cache. Anything older is fetched synchronously.
+
+    Args:
+        path: Interface path relative to the API base, e.g. "ISteamUser/GetPlayerSummaries/v0002/".
+        params: Query string parameters, including the API key where required.
+
+    Returns:
+        A tuple of (decoded body, age in seconds if the body is stale, else None,
+        whether the body was fetched from Steam by this call rather than served
+        from a cache). The body may be shared with other callers and must not be mutated.
+
+    Raises:
+        SteamAPIError: If the request fails or the body is not valid JSON.
+    """
+    failure_key = negative_key(path, params)
+    known_failure = negative_cache.get(failure_key)
+    if known_failure is not None:
+        entry, remaining = known_failure
+        if entry.body is not None:
+            return entry.body, None, False
+        raise SteamAPIError(f"{entry.message} (cached result, retry after {round(remaining)} seconds)", entry.status_code)
+
+    policy = policy_for(path)
+    if policy.ttl <= 0:
+        return _fetch_classified(path, params, failure_key)[0], None, True
+
+    key = cache_key(path, params)
+    entry = response_cache.get(key)
+    if entry is not None:
+        age = entry.age
+        if age < policy.ttl:
+            return entry.value, None, False
+        if age < policy.ttl + policy.stale_window:
+            _schedule_refresh(key, path, params)
+            return entry.value, age, False
+
+    data, size = _fetch_classified(path, params, failure_key)
+    response_cache.set(key, data, size)
+    return data, None, True
+
+
+def _fetch_classified(path: str, params: dict[str, Any], failure_key: str) -> tuple[dict, int]:
+    """Fetches a response and its size, remembering predictable negative outcomes in the negative cache."""
+    try:
+        data, size = _fetch_sized(path, params)
+    except SteamAPIError as e:
+        kind = classify_error(path, e.status_code, e.body)
+        if not kind:
+            raise
+        message = str(e)
+        if kind == "private_profile" and e.body is None:
+            message = "Access denied. The user's profile or friend list is not public."
+        negative_cache.add(failure_key, NegativeEntry(kind, message=message, status_code=e.status_code))
+        raise SteamAPIError(message, e.status_code, e.body) from e
+
+    kind = classify_body(path, data, params)
+    if kind:
+        negative_cache.add(failure_key, NegativeEntry(kind, body=data))
+    return data, size
+
+
+def get_json(path: str, params: dict[str, Any]) -> dict:
+    """Like get_json_with_age, for callers that do not report staleness."""
+    return get_json_with_age(path, params)[0]
+
+
+def open_stream(path: str, params: dict[str, Any]) -> requests.Response:
+    """
+    Performs a streaming GET request against the Steam Web API.
+
+    The body is not read up front; callers iterate over
+    response.iter_content() and must close the response when done.
+
+    Raises:
+        SteamAPIError: If the request fails.
+    """
+    response = send_request(path, params, stream=True)
+
+    try:
+        check_status(response)
+    except SteamAPIError:
+        response.close()
+        raise
+    return response
+
+
+def run_concurrently(tasks: dict[str, Callable[[], Any]], max_workers: int = MAX_WORKERS) -> dict[str, Any]:
+    """
+    Runs independent upstream calls in parallel.
+
+    Calls made from inside a task share that task's slice of MAX_WORKERS, so
+    nested fan-outs (e.g. a batch of timelines) stay within the connection
+    pool. With a single worker the tasks run one after another in the caller's thread.
+
+    Args:
+        tasks: Mapping of task name to a zero-argument callable.
+        max_workers: Maximum number of calls in flight at once.
+
+    Returns:
+        A mapping of task name to the callable's return value, or to the
+        exception it raised. Failures of one task never cancel the others.
+    """
+    if not tasks:
+        return {}
+
+    results = {}
+    share = _worker_share.get()
+    workers = max(min(max_workers, len(tasks), share), 1)
+    if workers == 1:
+        for name, task in tasks.items():
+            try:
+                results[name] = task()
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def in_context(task: Callable[[], Any]) -> Callable[[], Any]:
+        # Each task runs in a copy of the caller's context so its calls are accounted to the calling tool
+        context = contextvars.copy_context()
+        context.run(_worker_share.set, max(share // workers, 1))
+        return lambda: context.run(task)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(in_context(task)) for name, task in tasks.items()}
+        with phase("concurrent_wait"):
+            wait(futures.values())
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+    return results
@@ -0,0 +1,10 @@
+import os
+
+# Directory for data the plugin keeps between invocations
+DATA_DIR = os.environ.get("STEAM_DATA_DIR") or os.path.join(os.path.expanduser("~"), ".steam-dify-plugin")
+
+
+def data_path(filename: str) -> str:
+    """Returns the path of a file in the plugin data directory, creating the directory if needed."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
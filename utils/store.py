@@ -0,0 +1,214 @@
+from contextlib import closing
+import os
+import sqlite3
+import threading
+import time
+
+from utils.codec import dumps, loads
+from utils.steam_api import STORE_BASE_URL, fetch_json, run_concurrently
+from utils.storage import data_path
+
+DB_FILENAME = "store_metadata.sqlite3"
+
+# Seconds store metadata is reused before it is fetched again
+METADATA_TTL = int(os.environ.get("STEAM_STORE_TTL", str(7 * 86400)))
+
+# Store requests per minute; the store API throttles at roughly 200 per 5 minutes
+RATE_PER_MINUTE = float(os.environ.get("STEAM_STORE_RATE", "40"))
+
+# Upper bound on cache misses fetched by one call; the rest fill in on later calls
+MAX_FETCH_PER_CALL = int(os.environ.get("STEAM_STORE_MAX_FETCH", "40"))
+
+# Concurrent store requests within one call
+STORE_WORKERS = 8
+
+# Seconds a fetch waits for the rate limiter before the game is left for a later call
+RATE_WAIT = 5.0
+
+STORE_FILTERS = "basic,genres,categories,release_date,price_overview,developers,publishers"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS app_metadata (
+    appid INTEGER PRIMARY KEY,
+    fetched_at INTEGER NOT NULL,
+    data TEXT
+)
+"""
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    """Opens the metadata database, creating the table on first use."""
+    path = path or data_path(DB_FILENAME)
+    connection = sqlite3.connect(path, timeout=10)
+    if path not in _initialized:
+        with _init_lock:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            connection.commit()
+            _initialized.add(path)
+    return connection
+
+
+class RateLimiter:
+    """A token bucket allowing rate_per_minute acquisitions, with bursts up to burst."""
+
+    def __init__(self, rate_per_minute: float, burst: int = 10):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Takes one token, waiting up to timeout seconds for it. Returns False if none became available."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else timeout
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+rate_limiter = RateLimiter(RATE_PER_MINUTE)
+
+
+def summarize_appdetails(data: dict) -> dict:
+    """Keeps the appdetails fields useful for analysis."""
+    metadata = {
+        "type": data.get("type"),
+        "name": data.get("name"),
+        "is_free": data.get("is_free"),
+        "genres": [genre["description"] for genre in data.get("genres", []) if "description" in genre],
+        "categories": [category["description"] for category in data.get("categories", []) if "description" in category],
+        "developers": data.get("developers", []),
+        "publishers": data.get("publishers", []),
+    }
+    release = data.get("release_date") or {}
+    if release.get("date"):
+        metadata["release_date"] = release["date"]
+    price = data.get("price_overview")
+    if price:
+        metadata["price"] = {
+            "currency": price.get("currency"),
+            "final": price.get("final_formatted"),
+            "discount_percent": price.get("discount_percent"),
+        }
+    return metadata
+
+
+def _fetch_appdetails(appid: int) -> dict | None:
+    """
+    Fetches one game's store metadata.
+
+    Returns None for apps the store has no page for (e.g. delisted games),
+    which are cached like any other result.
+    """
+    data = fetch_json("api/appdetails", {"appids": appid, "filters": STORE_FILTERS}, base_url=STORE_BASE_URL)
+    entry = (data or {}).get(str(appid)) or {}
+    if not entry.get("success"):
+        return None
+    return summarize_appdetails(entry.get("data") or {})
+
+
+def load_cached(appids: list[int], path: str | None = None) -> dict[int, dict | None]:
+    """Returns cached metadata younger than METADATA_TTL for the given appids."""
+    if not appids:
+        return {}
+    cutoff = int(time.time()) - METADATA_TTL
+    cached = {}
+    with closing(connect(path)) as connection:
+        # Chunked to stay under SQLite's bound parameter limit
+        for start in range(0, len(appids), 500):
+            chunk = appids[start:start + 500]
+            rows = connection.execute(
+                f"SELECT appid, data FROM app_metadata WHERE fetched_at >= ? AND appid IN ({','.join('?' * len(chunk))})",
+                [cutoff, *chunk],
+            ).fetchall()
+            for appid, data in rows:
+                cached[appid] = loads(data) if data else None
+    return cached
+
+
+def store_metadata(metadata: dict[int, dict | None], path: str | None = None) -> None:
+    """Saves fetched metadata, with None marking apps that have no store page."""
+    if not metadata:
+        return
+    now = int(time.time())
+    with closing(connect(path)) as connection:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO app_metadata VALUES (?, ?, ?)",
+                # Stored as text to match the column type; loads reads text and older BLOB rows alike
+                [(appid, now, dumps(data).decode("utf-8") if data is not None else None) for appid, data in metadata.items()],
+            )
+
+
+def get_metadata(appids: list[int], max_fetch: int = MAX_FETCH_PER_CALL) -> tuple[dict[int, dict], int]:
+    """
+    Returns store metadata for appids, fetching cache misses only.
+
+    Misses are fetched concurrently in the order given, so callers should
+    pass their most important games first. At most max_fetch misses are
+    fetched per call and each fetch passes the shared rate limiter; games
+    left over or refused by the limiter are counted as pending and fill in
+    on later calls.
+
+    Returns:
+        Metadata by appid for every game the store has a page for, and the
+        number of games whose metadata is still pending.
+    """
+    cached = load_cached(appids)
+    misses = [appid for appid in appids if appid not in cached]
+    to_fetch = misses[:max_fetch]
+
+    def fetch(appid: int):
+        def task():
+            if not rate_limiter.acquire(RATE_WAIT):
+                raise TimeoutError("Store rate limit reached")
+            return _fetch_appdetails(appid)
+        return task
+
+    results = run_concurrently({appid: fetch(appid) for appid in to_fetch}, max_workers=STORE_WORKERS)
+    fetched = {appid: result for appid, result in results.items() if not isinstance(result, Exception)}
+    store_metadata(fetched)
+
+    cached.update(fetched)
+    pending = len(misses) - len(fetched)
+    return {appid: data for appid, data in cached.items() if data is not None}, pending
+
+
+def genre_rollup(games: list[dict], metadata: dict[int, dict], field: str = "playtime_forever") -> list[dict]:
+    """
+    Sums playtime per genre across games with metadata, most played first.
+
+    A game with several genres counts fully towards each of them.
+
+    Args:
+        games: Entries with appid and the playtime field, in minutes.
+        metadata: Store metadata by appid, as returned by get_metadata.
+        field: The playtime field to sum.
+    """
+    rollup: dict[str, list[int]] = {}
+    for game in games:
+        info = metadata.get(game.get("appid"))
+        if not info:
+            continue
+        for genre in info.get("genres", []):
+            totals = rollup.setdefault(genre, [0, 0])
+            totals[0] += game.get(field, 0)
+            totals[1] += 1
+
+    return [
+        {"genre": genre, "playtime_minutes": minutes, "playtime_hours": round(minutes / 60, 1), "game_count": count}
+        for genre, (minutes, count) in sorted(rollup.items(), key=lambda item: item[1][0], reverse=True)
+    ]
@@ -0,0 +1,158 @@
+import base64
+import bisect
+import heapq
+import os
+from operator import attrgetter
+
+from utils.cache import ResponseCache, StripedLocks
+from utils.steam_api import get_json, get_json_with_age, run_concurrently
+
+# Seconds a merged timeline is reused for follow-up pages before it is rebuilt
+TIMELINE_TTL = int(os.environ.get("STEAM_TIMELINE_TTL", "600"))
+
+# Upper bound on the memory held by cached timelines, and the estimated cost of one unlock in it.
+# A single timeline may use the whole cap, so it must fit the largest accounts served
+TIMELINE_CACHE_BYTES = int(os.environ.get("STEAM_TIMELINE_CACHE_BYTES", str(64 * 1024 * 1024)))
+EVENT_BYTES = 200
+
+
+class UnlockEvent:
+    __slots__ = ("unlocktime", "appid", "apiname", "game_name")
+
+    def __init__(self, unlocktime: int, appid: int, apiname: str, game_name: str | None):
+        self.unlocktime = unlocktime
+        self.appid = appid
+        self.apiname = apiname
+        self.game_name = game_name
+
+    @property
+    def sort_key(self) -> tuple[int, int, str]:
+        # Newest first; appid and apiname break ties so the order is total and cursors are stable
+        return (-self.unlocktime, self.appid, self.apiname)
+
+
+class Timeline:
+    """A player's unlocks across all games, merged newest first."""
+
+    __slots__ = ("events", "games_scanned", "games_failed")
+
+    def __init__(self, events: list[UnlockEvent], games_scanned: int, games_failed: int):
+        self.events = events
+        self.games_scanned = games_scanned
+        self.games_failed = games_failed
+
+    def page(self, cursor: str | None, size: int) -> tuple[list[UnlockEvent], str | None]:
+        """Returns the events after cursor and the cursor of the following page, if any."""
+        # Sort keys are derived per probe rather than stored, which keeps cached timelines compact
+        start = bisect.bisect_right(self.events, decode_cursor(cursor), key=attrgetter("sort_key")) if cursor else 0
+        events = self.events[start:start + size]
+        next_cursor = encode_cursor(events[-1]) if events and start + size < len(self.events) else None
+        return events, next_cursor
+
+
+def encode_cursor(event: UnlockEvent) -> str:
+    raw = f"{event.unlocktime}:{event.appid}:{event.apiname}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, int, str]:
+    """
+    Turns a cursor back into the sort key of the last event of the previous page.
+
+    Cursors name a position rather than an offset, so they stay valid when the
+    timeline is rebuilt with new unlocks in between.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        unlocktime, appid, apiname = raw.split(":", 2)
+        return (-int(unlocktime), int(appid), apiname)
+    except ValueError:
+        raise Exception("Invalid cursor. Pass the next_cursor value returned by the previous page.")
+
+
+def game_unlocks(appid: int, game_name: str | None, playerstats: dict) -> list[UnlockEvent]:
+    """Returns one game's unlocked achievements, newest first."""
+    events = [
+        UnlockEvent(achievement.get("unlocktime", 0), appid, achievement.get("apiname", ""), game_name)
+        for achievement in playerstats.get("achievements", [])
+        if achievement.get("achieved") == 1
+    ]
+    events.sort(key=lambda event: event.sort_key)
+    return events
+
+
+def merge_timelines(per_game: list[list[UnlockEvent]]) -> list[UnlockEvent]:
+    """K-way merges per-game lists that are each sorted newest first."""
+    return list(heapq.merge(*per_game, key=lambda event: event.sort_key))
+
+
+def build_timeline(api_key: str, steamid: str) -> Timeline:
+    """
+    Fetches unlocks for every owned game with stats and merges them into one timeline.
+
+    Only games with community-visible stats and some playtime are queried,
+    since achievements cannot be unlocked in a game that was never played.
+    Per-game failures (e.g. games without achievements) are skipped and counted.
+    """
+    data, _ = get_json_with_age(
+        "IPlayerService/GetOwnedGames/v0001/",
+        {"key": api_key, "steamid": steamid, "include_appinfo": 1, "include_played_free_games": 1, "format": "json"},
+    )
+    if "response" not in data:
+        raise Exception("Invalid API response format")
+
+    games = [
+        game for game in data["response"].get("games", [])
+        if game.get("has_community_visible_stats") and game.get("playtime_forever", 0) > 0
+    ]
+    responses = run_concurrently({
+        game["appid"]: (lambda appid=game["appid"]: get_json(
+            "ISteamUserStats/GetPlayerAchievements/v0001/",
+            {"appid": appid, "key": api_key, "steamid": steamid},
+        ))
+        for game in games
+    })
+
+    per_game = []
+    failed = 0
+    for game in games:
+        response = responses[game["appid"]]
+        playerstats = response.get("playerstats") if isinstance(response, dict) else None
+        if not playerstats or "error" in playerstats:
+            failed += 1
+            continue
+        events = game_unlocks(game["appid"], game.get("name") or playerstats.get("gameName"), playerstats)
+        if events:
+            per_game.append(events)
+
+    return Timeline(merge_timelines(per_game), len(games), failed)
+
+
+_timelines = ResponseCache(max_entries=64, max_bytes=TIMELINE_CACHE_BYTES)
+_build_locks = StripedLocks()
+
+
+def get_timeline(api_key: str, steamid: str, refresh: bool = False) -> tuple[Timeline, float | None]:
+    """
+    Returns the cached timeline for a player, building it on a miss.
+
+    Concurrent misses for the same player share a single build.
+
+    Returns:
+        The timeline and its age in seconds when it was served from cache.
+    """
+    key = f"{api_key}|{steamid}"
+
+    entry = _timelines.get(key)
+    if entry is not None and entry.age < TIMELINE_TTL and not refresh:
+        return entry.value, entry.age
+
+    with _build_locks.for_key(key):
+        entry = _timelines.get(key)
+        if entry is not None and entry.age < TIMELINE_TTL and not refresh:
+            return entry.value, entry.age
+
+        timeline = build_timeline(api_key, steamid)
+        _timelines.set(key, timeline, len(timeline.events) * EVENT_BYTES)
+        return timeline, None
+